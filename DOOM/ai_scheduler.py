@@ -0,0 +1,69 @@
+from __future__ import annotations
+from typing import TYPE_CHECKING, List
+if TYPE_CHECKING:
+    from enemy import Enemy
+
+import math
+import time
+
+from config import *
+
+
+class AIScheduler:
+    """Decides which enemies think in a frame.
+
+    Active enemies (close to the player, chasing it, or in the middle of an action, see
+    `Enemy.is_active`) think every frame. The others take turns: every frame the next slice
+    of them thinks, so each one thinks about once every `AI_IDLE_INTERVAL` frames. The
+    slice stops early once the AI took `AI_FRAME_BUDGET_MS` in the frame, but at least one
+    idle enemy thinks every frame so none of them is starved.
+
+    Attributes:
+        `cursor` (`int`): Where the next slice of idle enemies starts.
+        `ticked` (`int`): The number of enemies that thought in the last frame.
+        `active` (`int`): The number of active enemies in the last frame.
+        `idle` (`int`): The number of idle enemies in the last frame.
+        `frame_time` (`float`): The time the AI took in the last frame, in milliseconds.
+    """
+
+    def __init__(self) -> None:
+        self.cursor: int = 0
+
+        self.ticked: int = 0
+        self.active: int = 0
+        self.idle: int = 0
+        self.frame_time: float = 0
+
+    def update(self, enemies: List[Enemy]) -> None:
+        """Let the enemies that are due think."""
+
+        start = time.perf_counter()
+        deadline = start + AI_FRAME_BUDGET_MS / 1000
+
+        idle = []
+        for enemy in enemies:
+            if enemy.is_active():
+                enemy.think()
+            else:
+                idle.append(enemy)
+
+        self.active = len(enemies) - len(idle)
+        self.idle = len(idle)
+        self.ticked = self.active
+
+        if idle:
+            self.cursor %= len(idle)
+            count = math.ceil(len(idle) / AI_IDLE_INTERVAL)
+            for i in range(count):
+                if i > 0 and time.perf_counter() > deadline:
+                    break
+                idle[(self.cursor + i) % len(idle)].think()
+                self.ticked += 1
+            self.cursor += self.ticked - self.active
+
+        self.frame_time = (time.perf_counter() - start) * 1000
+
+    def debug_text(self) -> str:
+        """Get a short summary of the last frame, for the debug readout."""
+
+        return f"ai: {self.ticked} of {self.active + self.idle} ticked, {self.active} active, {self.frame_time:.1f} ms"
@@ -0,0 +1,201 @@
+"""Micro-benchmarks of the map's hot paths, on generated maps.
+
+Run it from the project's root directory:
+
+    py DOOM/benchmark.py
+"""
+
+import math
+import random
+import time
+from typing import Callable, List, Tuple
+
+from map import Map
+from path_cache import PathCache
+from renderer.sprite_culler import SpriteCuller
+from config import *
+
+MAP_SIZE: int = 256
+QUERIES: int = 2000
+
+
+def random_map(size: int, seed: int = 0) -> Map:
+    """Generate a `size` x `size` map of walled rooms, with doors between them and scattered
+    pillars inside them."""
+
+    rng = random.Random(seed)
+    matrix = [[" "] * size for _ in range(size)]
+    room = 16
+    for y in range(size):
+        for x in range(size):
+            on_wall = x % room == 0 or y % room == 0 or x in (0, size - 1) or y in (0, size - 1)
+            # a door in the middle of every wall, except on the outer walls
+            door = (x % room == room // 2 or y % room == room // 2) and 0 < x < size - 1 and 0 < y < size - 1
+            if (on_wall and not door) or rng.random() < 0.08:
+                matrix[y][x] = "STARTAN3"
+
+    level_map = Map()
+    level_map.load(matrix)
+    return level_map
+
+
+def random_queries(level_map: Map, count: int, max_distance: int = None, seed: int = 0)\
+      -> List[Tuple[Tuple[int, int], Tuple[int, int]]]:
+    """Pick `count` pairs of empty cells, optionally at most `max_distance` cells apart."""
+
+    rng = random.Random(seed)
+    empty = [(x, y) for y in range(level_map.height) for x in range(level_map.width)
+             if not level_map.solid[y, x]]
+    queries = []
+    while len(queries) < count:
+        start = rng.choice(empty)
+        if max_distance is None:
+            target = rng.choice(empty)
+        else:
+            x = start[0] + rng.randint(-max_distance, max_distance)
+            y = start[1] + rng.randint(-max_distance, max_distance)
+            if not (0 <= x < level_map.width and 0 <= y < level_map.height) or level_map.solid[y, x]:
+                continue
+            target = x, y
+        queries.append((start, target))
+    return queries
+
+
+def measure(name: str, function: Callable, queries: list) -> None:
+    """Run `function` on every query and print how many queries were done per second."""
+
+    start = time.perf_counter()
+    for query in queries:
+        function(*query)
+    elapsed = time.perf_counter() - start
+    print(f"{name:<40} {len(queries) / elapsed:>12.0f} queries/s")
+
+
+def benchmark_pathfinding() -> None:
+    level_map = random_map(MAP_SIZE)
+    print(f"Pathfinding on a {MAP_SIZE}x{MAP_SIZE} map:")
+
+    # done once per map, by the first search
+    start = time.perf_counter()
+    level_map.pathfinder.prepare()
+    print(f"{'A*, preparing the map':<40} {(time.perf_counter() - start) * 1000:>12.0f} ms")
+
+    # enemies only chase the player from their detection distance
+    near = random_queries(level_map, QUERIES, max_distance=12)
+    far = random_queries(level_map, QUERIES // 20)
+
+    measure("A*, nearby cells", level_map.pathfinder.find_path, near)
+    measure("A*, anywhere on the map", level_map.pathfinder.find_path, far)
+
+    # the same queries again are answered from the path cache, big enough for all their
+    # targets instead of the player's last few cells
+    level_map.path_cache = PathCache(max_targets=len(near))
+    for query in near:
+        level_map.astar_next(*query)
+    measure("astar_next, nearby cells, cached", level_map.astar_next, near)
+
+    try:
+        from pathfinding.core.diagonal_movement import DiagonalMovement
+        from pathfinding.core.grid import Grid
+        from pathfinding.finder.a_star import AStarFinder
+    except ModuleNotFoundError:
+        return
+
+    # the pathfinding library the game used before, for comparison
+    grid = Grid(matrix=(~level_map.solid).astype(int).tolist())
+    finder = AStarFinder(diagonal_movement=DiagonalMovement.only_when_no_obstacle)
+
+    def library_find_path(start: Tuple[int, int], target: Tuple[int, int]) -> list:
+        grid.cleanup()
+        return finder.find_path(grid.node(*start), grid.node(*target), grid)
+
+    measure("pathfinding library, nearby cells", library_find_path, near[:QUERIES // 20])
+
+
+class Point:
+    def __init__(self, x: float, y: float) -> None:
+        self.x: float = x
+        self.y: float = y
+
+
+def benchmark_culling(size: int = 64, count: int = 500) -> None:
+    rng = random.Random(0)
+    points = [Point(rng.uniform(0, size), rng.uniform(0, size)) for _ in range(count)]
+    # the player in the middle of the map, looking around
+    views = [(size / 2, size / 2, rng.uniform(0, math.tau)) for _ in range(QUERIES)]
+    print(f"Culling {count} sprites on a {size}x{size} map:")
+
+    def per_sprite(x: float, y: float, angle: float) -> list:
+        # what every sprite did on its own before: its angle and distance to the player
+        visible = []
+        for point in points:
+            dx, dy = point.x - x, point.y - y
+            delta = abs((math.atan2(dy, dx) - angle + math.pi) % math.tau - math.pi)
+            if delta < SPRITE_CULL_HALF_ANGLE and math.hypot(dx, dy) <= MAX_DEPTH:
+                visible.append(point)
+        return visible
+
+    culler = SpriteCuller()
+    for point in points:
+        culler.add(point)
+
+    measure("per-sprite angle and distance", per_sprite, views[:QUERIES // 10])
+    measure("vectorized view cone", culler.visible, views)
+
+
+def benchmark_unoccupied() -> None:
+    level_map = random_map(MAP_SIZE)
+    rng = random.Random(0)
+    # some lookups fall out of the map, like the rays of the raycaster do
+    cells = [(rng.randint(-2, MAP_SIZE + 1), rng.randint(-2, MAP_SIZE + 1)) for _ in range(QUERIES * 50)]
+    rays = [(rng.uniform(0, MAP_SIZE), rng.uniform(0, MAP_SIZE), rng.uniform(0, math.tau)) for _ in range(QUERIES * 5)]
+    print(f"Occupancy lookups on a {MAP_SIZE}x{MAP_SIZE} map:")
+
+    def nested_lists(x: int, y: int) -> bool:
+        # what `Map.unoccupied` did before, on the map's rows of texture names
+        if 0 <= x < level_map.width and 0 <= y < level_map.height:
+            try:
+                return level_map.map[y][x] == " "
+            except IndexError:
+                return True
+        return True
+
+    def walk_nested_lists(x: float, y: float, angle: float) -> str:
+        # a ray stepped a tenth of a cell at a time until it is in a wall, like the python 
+        # raycaster did before
+        dx, dy = math.cos(angle) * 0.1, math.sin(angle) * 0.1
+        for _ in range(MAX_DEPTH * 10):
+            if not nested_lists(int(x), int(y)):
+                return level_map.map[int(y)][int(x)]
+            x += dx
+            y += dy
+        return "EMPTY"
+
+    def walk_texture_ids(x: float, y: float, angle: float) -> int:
+        # the same, with the texture id grid looked up in place
+        tex_grid, grid_width = level_map.tex_grid, level_map.grid_width
+        width, height = level_map.width, level_map.height
+        dx, dy = math.cos(angle) * 0.1, math.sin(angle) * 0.1
+        for _ in range(MAX_DEPTH * 10):
+            col, row = int(x), int(y)
+            if 0 <= col < width and 0 <= row < height and tex_grid[(row + 1) * grid_width + col + 1]:
+                return tex_grid[(row + 1) * grid_width + col + 1]
+            x += dx
+            y += dy
+        return 0
+
+    # single lookups cost about the same, the function call is most of it
+    measure("unoccupied, nested lists", nested_lists, cells)
+    measure("unoccupied, flat occupancy grid", level_map.unoccupied, cells)
+    measure("ray walk, nested lists", walk_nested_lists, rays)
+    measure("ray walk, flat texture id grid", walk_texture_ids, rays)
+
+
+def main() -> None:
+    benchmark_pathfinding()
+    benchmark_culling()
+    benchmark_unoccupied()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,107 @@
+"""Builds the texture atlases used by `renderer/atlas.py`.
+
+Packs the wall textures (scaled to `TEX_SIZE`), the sprites and the HUD images into 
+atlas pages of raw RGBA pixels, and writes an index of where every image is. Run it 
+from the project's root directory after changing any of these images:
+
+    py DOOM/build_atlas.py
+"""
+
+import json
+import os
+
+import pygame as pg
+
+from config import TEX_SIZE
+from renderer.atlas import RESOURCES_DIR, ATLAS_DIR, INDEX_FILE, atlas_key, source_hash
+
+# name of the page: (directory with the images, width of the page, scale images to TEX_SIZE)
+PAGES = {
+    "walls": ("textures/walls", 16 * TEX_SIZE, True),
+    "sprites": ("textures/sprites", 1024, False),
+    "hud": ("textures/hud", 512, False)
+}
+
+
+def list_images(directory: str) -> list[str]:
+    """Get the paths of every image in `directory` and its subdirectories."""
+
+    paths = []
+    for root, _, files in os.walk(directory):
+        for file_name in sorted(files):
+            if file_name.endswith(".png"):
+                paths.append(os.path.join(root, file_name))
+    return paths
+
+
+def pack(sizes: list[tuple[int, int]], width: int) -> tuple[list[tuple[int, int]], int]:
+    """Place rectangles on shelves, tallest first.
+
+    Args:
+        sizes (list[tuple[int, int]]): The size of every rectangle.
+        width (int): The width of the page.
+
+    Returns:
+        tuple[list[tuple[int, int]], int]: The position of every rectangle, and the height 
+            of the page.
+    """
+    positions = [None] * len(sizes)
+    x = y = shelf_height = 0
+    for i in sorted(range(len(sizes)), key=lambda i: -sizes[i][1]):
+        w, h = sizes[i]
+        if x + w > width:
+            x, y = 0, y + shelf_height
+            shelf_height = 0
+        positions[i] = x, y
+        x += w
+        shelf_height = max(shelf_height, h)
+    return positions, y + shelf_height
+
+
+def build_page(name: str, directory: str, width: int, scale_to_tex: bool) -> tuple[dict, dict]:
+    """Pack the images of a directory into one page and write its pixels.
+
+    Returns:
+        tuple[dict, dict]: The page's index info, and the index entries of its images.
+    """
+    paths = list_images(RESOURCES_DIR + directory)
+    images = []
+    for path in paths:
+        image = pg.image.load(path)
+        if scale_to_tex:
+            image = pg.transform.scale(image, (TEX_SIZE, TEX_SIZE))
+        images.append(image)
+
+    positions, height = pack([image.get_size() for image in images], width)
+
+    page = pg.Surface((width, height), pg.SRCALPHA, 32)
+    entries = {}
+    for path, image, position in zip(paths, images, positions):
+        page.blit(image, position)
+        entries[atlas_key(path)] = {"page": name, "rect": [*position, *image.get_size()], "hash": source_hash(path)}
+
+    file_name = name + ".rgba"
+    with open(ATLAS_DIR + file_name, "wb") as f:
+        f.write(pg.image.tobytes(page, "RGBA"))
+
+    print(f"Packed {len(paths)} images into {file_name} ({width}x{height})")
+    return {"file": file_name, "size": [width, height]}, entries
+
+
+def main() -> None:
+    """Build every page and the index."""
+
+    os.makedirs(ATLAS_DIR, exist_ok=True)
+
+    index = {"pages": {}, "entries": {}}
+    for name, (directory, width, scale_to_tex) in PAGES.items():
+        page, entries = build_page(name, directory, width, scale_to_tex)
+        index["pages"][name] = page
+        index["entries"].update(entries)
+
+    with open(ATLAS_DIR + INDEX_FILE, "w") as f:
+        json.dump(index, f, indent=1)
+
+
+if __name__ == "__main__":
+    main()
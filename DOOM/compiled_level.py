@@ -0,0 +1,158 @@
+"""Levels compiled into a single binary file, loaded without any parsing or decoding.
+
+A level is made of a `.txt` file of entities and a `.png` map, which are slow to parse and
+decode. The compiled form holds the result of both: the map's texture ids and texture
+names, every entity spawn, the sky and the player's spawn. It is saved next to the level
+as a `.lvl` file, and memory-mapped when it is loaded.
+
+What this saves is the parsing and the decoding: the grid and the spawns are views of the
+mapped file, but `Map.load_texture_ids` copies the grid into a writable array of its own,
+and the spawns are read into Python values when the entities are spawned.
+
+The file starts with a hash of the `.txt` and `.png` files it was compiled from and of
+the compiler, so it is compiled again automatically when any of them changes.
+
+Layout, little-endian:
+    `HEADER`
+    the names, UTF-8, one per line: the sky, the texture names, the spawn names
+    padding to a multiple of 8 bytes
+    the (height, width) texture ids, as uint16
+    padding to a multiple of 8 bytes
+    the spawns, as `SPAWN` records
+
+Usage:
+    key = CompiledLevel.key("DOOM/resources/map_data/1", COMPILER)
+    level = CompiledLevel.load("DOOM/resources/map_data/1.lvl", key)
+"""
+
+from __future__ import annotations
+from typing import List, Tuple
+
+import hashlib
+import mmap
+import os
+import struct
+
+import numpy as np
+
+MAGIC = b"LVL1"
+# magic, key, width, height, texture names, spawn names, spawns, bytes of names, lever
+# x and y, whether the player's spawn is set, and the player's x, y and angle
+HEADER = struct.Struct("<4s20sHHHHIIhh?3d")
+SPAWN = np.dtype([("kind", "<u1"), ("name", "<u2"), ("x", "<f8"), ("y", "<f8")])
+
+# the kinds of spawns
+OBJECT = 0
+ENEMY = 1
+PICKUP = 2
+
+
+def align(offset: int) -> int:
+    return (offset + 7) // 8 * 8
+
+
+class CompiledLevel:
+    """Everything needed to set up a level, without the game objects.
+
+    Attributes:
+        `tex_ids` (`np.ndarray`): The (height, width) grid of texture ids of the map.
+        `tex_names` (`list[str]`): The texture names, indexed by id. Id 0 is "EMPTY".
+        `spawns` (`np.ndarray`): The kind, name index, x and y of every entity, in the
+            order of the `.txt` file.
+        `spawn_names` (`list[str]`): The names of the objects, enemies and pickups spawned.
+        `sky_name` (`str`): The sky texture, or None.
+        `player_pos` (`tuple[float, float]`): The player's spawn position, or None.
+        `player_rot` (`float`): The player's spawn angle, in radians.
+        `next_level` (`tuple[int, int]`): The cell of the lever, or None.
+    """
+
+    def __init__(self, tex_ids: np.ndarray, tex_names: List[str], spawns: np.ndarray, spawn_names: List[str],
+                 sky_name: str = None, player_pos: Tuple[float, float] = None, player_rot: float = 0,
+                 next_level: Tuple[int, int] = None) -> None:
+        self.tex_ids: np.ndarray = tex_ids
+        self.tex_names: List[str] = tex_names
+        self.spawns: np.ndarray = spawns
+        self.spawn_names: List[str] = spawn_names
+        self.sky_name: str = sky_name
+        self.player_pos: Tuple[float, float] = player_pos
+        self.player_rot: float = player_rot
+        self.next_level: Tuple[int, int] = next_level
+
+    @staticmethod
+    def key(path: str, compiler: bytes) -> bytes:
+        """Hash the `.txt` and `.png` files of the level at `path` (without extension), and 
+        `compiler`, which identifies the code the level is compiled with."""
+
+        digest = hashlib.sha1(compiler)
+        for extension in (".txt", ".png"):
+            with open(path + extension, "rb") as f:
+                digest.update(f.read())
+        return digest.digest()
+
+    @staticmethod
+    def load(path: str, key: bytes) -> CompiledLevel:
+        """Memory-map the compiled level at `path`.
+
+        Returns:
+            CompiledLevel: The level, or None if the file is missing or can't be read, is 
+                in an older format, or was compiled from other sources than the ones `key`
+                was computed for.
+        """
+        try:
+            if os.path.getsize(path) < HEADER.size:
+                return None
+            with open(path, "rb") as f:
+                data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except OSError:
+            return None
+
+        magic, file_key, width, height, tex_count, name_count, spawn_count, names_size, lever_x, lever_y, \
+            has_player, player_x, player_y, player_rot = HEADER.unpack_from(data)
+        if magic != MAGIC or file_key != key:
+            data.close()
+            return None
+
+        offset = HEADER.size
+        names = data[offset:offset + names_size].decode("utf-8").split("\n")
+        offset = align(offset + names_size)
+
+        # views of the mapped file, it stays open as long as they are used
+        tex_ids = np.frombuffer(data, dtype="<u2", count=width * height, offset=offset).reshape(height, width)
+        offset = align(offset + tex_ids.nbytes)
+        spawns = np.frombuffer(data, dtype=SPAWN, count=spawn_count, offset=offset)
+
+        return CompiledLevel(tex_ids, names[1:1 + tex_count], spawns, names[1 + tex_count:1 + tex_count + name_count],
+                             names[0] or None, (player_x, player_y) if has_player else None, player_rot,
+                             (lever_x, lever_y) if lever_x >= 0 else None)
+
+    def save(self, path: str, key: bytes) -> None:
+        """Write the level to `path`.
+
+        Raises:
+            OSError: when the file can't be written.
+        """
+        height, width = self.tex_ids.shape
+        names = "\n".join([self.sky_name or ""] + self.tex_names + self.spawn_names).encode("utf-8")
+        lever_x, lever_y = self.next_level if self.next_level is not None else (-1, -1)
+        player_x, player_y = self.player_pos if self.player_pos is not None else (0, 0)
+
+        header = HEADER.pack(MAGIC, key, width, height, len(self.tex_names), len(self.spawn_names), len(self.spawns),
+                             len(names), lever_x, lever_y, self.player_pos is not None, player_x, player_y,
+                             self.player_rot)
+        tex_ids = self.tex_ids.astype("<u2").tobytes()
+
+        # written next to it and swapped in, a level that still maps the old file keeps it
+        try:
+            with open(path + ".tmp", "wb") as f:
+                f.write(header)
+                f.write(names)
+                f.write(bytes(align(len(header) + len(names)) - len(header) - len(names)))
+                f.write(tex_ids)
+                f.write(bytes(align(len(tex_ids)) - len(tex_ids)))
+                f.write(self.spawns.astype(SPAWN).tobytes())
+            os.replace(path + ".tmp", path)
+        except OSError:
+            # don't leave a partly written file behind
+            if os.path.isfile(path + ".tmp"):
+                os.remove(path + ".tmp")
+            raise
@@ -15,6 +15,12 @@ RAYS: float = WIN_WIDTH // 2
 HALF_RAYS: float = RAYS // 2
 DELTA_ANGLE: float = FOV / RAYS
 MAX_DEPTH = 20
+# "numpy" casts every ray at once over the map's occupancy grid, "python" walks them one by one
+RAYCAST_BACKEND: str = "numpy"
+# number of entries in the sin/cos lookup table for one full turn
+TRIG_TABLE_RESOLUTION: int = 16384
+# use math.sin/math.cos instead of the lookup table, for verifying the table
+EXACT_TRIG: bool = False
 SCREEN_DISTANCE: float = WIN_HALF_WIDTH / math.tan(HALF_FOV)
 SCALE: int = WIN_WIDTH // RAYS
 
@@ -23,6 +29,21 @@ PLAYER_MOVE_SPEED: float = 2.5
 PLAYER_SIZE_SCALE: float = 0.03
 
 ENEMY_SIZE_SCALE: float = 0.2
+# "flow_field" shares one distance map to the player between all enemies, "astar" searches
+# a path for every enemy on its own
+ENEMY_PATHFINDING: str = "flow_field"
+# "astar" keeps the paths to this many of the player's last cells, the oldest are dropped
+PATH_CACHE_TARGETS: int = 8
+# A* estimates the remaining cost from the path lengths to one of this many landmark cells, 
+# more expand fewer cells but take longer to prepare
+ASTAR_LANDMARKS: int = 16
+# enemies further than their detection distance plus this margin, and not busy, are idle and 
+# think at a reduced rate
+AI_ACTIVE_MARGIN: float = 2
+# every idle enemy thinks about once every this many frames
+AI_IDLE_INTERVAL: int = 6
+# time the AI may take in a frame before the remaining idle enemies wait, in milliseconds
+AI_FRAME_BUDGET_MS: float = 2
 
 MOUSE_SPEED: float = 0.0015
 CLASSIC_MOUSE_SPEED: float = 1
@@ -35,10 +56,41 @@ GRID_SIZE: float = 1
 TEX_SIZE: int = 256
 HALF_TEX_SIZE: int = TEX_SIZE // 2
 
+# "columns" blits every wall column as its own Surface, "framebuffer" writes all the walls
+# straight into the window's pixels in one pass (needs a 32-bit window)
+WALL_RENDERER: str = "columns"
+# number of brightness levels things are darkened to with distance
+SHADE_BANDS: int = 32
+# resolution of the depth to shading band table, in entries per unit of depth
+SHADE_DEPTH_STEPS: int = 16
+# memory budget of the pre-scaled wall columns cache, in bytes
+WALL_COLUMN_CACHE_BYTES: int = 64 * 1024 * 1024
+# memory budget of the scaled sprites cache, in bytes
+SPRITE_CACHE_BYTES: int = 32 * 1024 * 1024
+# sprites are scaled to heights rounded to this many pixels, so similar sizes share a cached image
+SPRITE_HEIGHT_STEP: int = 2
+
 PICKUP_DISTANCE: float = 0.9
 
+# size of the cells of the index used to find the entities near a position, in grid units
+SPATIAL_HASH_CELL_SIZE: float = 4
+# sprites further than this angle from the view direction aren't projected
+SPRITE_CULL_HALF_ANGLE: float = HALF_FOV + math.radians(20)
+# sprites this close to the player are always projected, as they can be wider than the screen
+SPRITE_CULL_NEAR_DISTANCE: float = 1.5
+
 SOUND_MAX_DISTANCE: float = 15
 
+# maps with more cells than this get no potentially visible sets, they take (cells)² bits and
+# building them takes a few milliseconds per cell
+PVS_MAX_CELLS: int = 64 * 64
+
+# number of worker threads loading the next level while a menu is shown
+PRELOAD_WORKERS: int = 2
+
+# show performance counters in the top right corner
+SHOW_DEBUG_INFO: bool = False
+
 DIFFICULTY_DAMAGE_SCALING: List[float] = [0.7, 0.86, 1, 1.14, 1.45]
 DIFFICULTY_ACCURACY_SCALING: List[float] = [0.88, 0.96, 1, 1.04, 1.2]
 DIFFICULTY_RANGE_SCALING: List[float] = [0.96, 0.98, 1, 1.02, 1.04]
@@ -65,7 +65,8 @@ class Enemy(AnimatedSpriteObject):
         if self.game.player.health <= 0:
             return
 
-        self.can_see_player = self.raycast_to_player()
+        # computed for all enemies at once, and cached until the player or the enemy moves
+        self.can_see_player = self.game.objects_manager.visibility.can_see(self)
 
         in_detection = self.player_in_detection_distance() or self.aggravated
         in_attack = self.player_in_attack_distance()
@@ -104,6 +105,7 @@ class Enemy(AnimatedSpriteObject):
             self.x += dx
         if self.game.level.map.unoccupied(int(self.x), int(self.y + dy * scale)):
             self.y += dy
+        self.game.objects_manager.enemy_moved(self)
     
     def movement(self) -> None:
         if self.target_position is None:
@@ -153,10 +155,31 @@ class Enemy(AnimatedSpriteObject):
                 self.image = self.death_anim[0]
                 self.frame_counter += 1
 
+            if self.frame_counter >= len(self.death_anim) - 1:
+                # nothing left to animate, from now on the enemy is only a static sprite
+                self.game.objects_manager.bury(self)
+
     def update(self) -> None:
-        self.check_anim_time()
+        # thinking is left to the AI scheduler, which may skip frames for idle enemies
         self.get_sprite()
+
+    def think(self) -> None:
+        self.check_anim_time()
         self.logics()
+
+    def is_active(self) -> bool:
+        """Check whether the enemy has to think every frame: when it is dying, chasing 
+        or close to the player, in the middle of an action, or in the player's line of fire.
+        Uses the distance to the player computed by `get_sprite` this frame."""
+
+        if not self.alive:
+            return self.frame_counter < len(self.death_anim) - 1
+        if self.aggravated or self.pain or self.attack or self.walk:
+            return True
+        if self.dist < self.detection_distance + AI_ACTIVE_MARGIN:
+            return True
+        # could be hit by the shot fired this frame
+        return self.game.player.weapon_shot and abs(self.screen_x - WIN_HALF_WIDTH) < self.sprite_half_width
     
     def check_hit(self) -> None:
         if self.game.player.weapon_shot and self.can_see_player:
@@ -188,73 +211,21 @@ class Enemy(AnimatedSpriteObject):
         if self.player_in_attack_distance() and self.can_see_player and not self.pain:
             self.attack = True
     
-    def raycast_to_player(self) -> bool:
-        if self.grid_position == self.game.player.grid_position:
-            return True  # no walls in a grid
-        
-        wall_d_vert, wall_d_hor = 0, 0
-        player_d_vert, player_d_hor = 0, 0
-
-        ox, oy = self.game.player.position
-        x_grid, y_grid = self.game.player.grid_position
-
-        ray_angle = self.theta
-        sin_a = math.sin(ray_angle)
-        cos_a = math.cos(ray_angle)
-
-        y_hor, dy = (y_grid + 1, 1) if sin_a > 0 else (y_grid - 1e-6, -1)
-        depth_hor = (y_hor - oy) / sin_a
-        x_hor = ox + depth_hor * cos_a
-
-        delta_depth = dy / sin_a
-        dx = delta_depth * cos_a
-
-        for i in range(MAX_DEPTH):
-            tile_hor = int(x_hor), int(y_hor)
-            if tile_hor == self.grid_position:
-                player_d_hor = depth_hor
-                break
-            if not self.game.level.map.unoccupied(*tile_hor):
-                wall_d_hor = depth_hor
-                break
-
-            x_hor += dx
-            y_hor += dy
-            depth_hor += delta_depth
-
-        x_vert, dx = (x_grid + 1, 1) if cos_a > 0 else (x_grid - 1e-6, -1)
-        depth_vert = (x_vert - ox) / cos_a
-        y_vert = oy + depth_vert * sin_a
-
-        delta_depth = dx / cos_a
-        dy = delta_depth * sin_a
-
-        for i in range(MAX_DEPTH):
-            tile_vert = int(x_vert), int(y_vert)
-            if tile_vert == self.grid_position:
-                player_d_vert = depth_vert
-                break
-            if not self.game.level.map.unoccupied(*tile_vert):
-                wall_d_vert = depth_vert
-                break
-
-            x_vert += dx
-            y_vert += dy
-            depth_vert += delta_depth
-
-        player_dist = max(player_d_vert, player_d_hor)
-        wall_dist = max(wall_d_vert, wall_d_hor)
-
-        return 0 < player_dist < wall_dist or wall_dist == 0
-
     def player_in_detection_distance(self) -> bool:
-        return math.hypot(self.game.player.x - self.x, self.game.player.y - self.y) < self.detection_distance
+        """Uses the distance to the player computed by `get_sprite` this frame."""
+
+        return self.dist < self.detection_distance
 
     def player_in_attack_distance(self) -> bool:
-        return math.hypot(self.game.player.x - self.x, self.game.player.y - self.y) < self.attack_distance
+        """Uses the distance to the player computed by `get_sprite` this frame."""
+
+        return self.dist < self.attack_distance
 
     def pathfind(self) -> None:
-        xy = self.game.level.map.astar_next(self.grid_position, self.game.player.grid_position)
+        if ENEMY_PATHFINDING == "flow_field":
+            xy = self.game.level.map.flow_next(self.grid_position, self.game.player.grid_position)
+        else:
+            xy = self.game.level.map.astar_next(self.grid_position, self.game.player.grid_position)
         if not xy:
             return
         x, y = xy
@@ -273,6 +244,8 @@ class Enemy(AnimatedSpriteObject):
             self.game.objects_manager.add_pickup(PICKUPS.get(loot_name)(self.game, self.position))
 
     def calculate_volume(self) -> float:
+        if self not in self.game.objects_manager.audible_enemies:
+            return 0
         distance = math.dist(self.game.player.position, self.position)
         if distance > SOUND_MAX_DISTANCE:
             return 0
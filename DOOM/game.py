@@ -8,6 +8,7 @@ the `Game` object from within `main.py`.
 import pygame as pg
 
 import datetime
+import time
 
 # import all the rendering classes
 from renderer.hud_renderer import HUDRenderer
@@ -21,10 +22,13 @@ from config import *
 # all other objects
 from player import Player
 from level import Level
+from level_preloader import LevelPreloader, PreparedLevel
 from audio import AudioManager
 from weapon import *
-from menu.menu import Menu
+from menu.menu import Menu, hud_text
 from menu.main_menu import MainMenu
+from renderer.asset_store import ASSETS
+from renderer.entity_store import ENTITIES
 
 
 class Game:
@@ -48,6 +52,7 @@ class Game:
         `object_renderer`: Renders most things, including walls, sky, ground, and sprites.
         `objects_manager`: Stores information about all objects such as enemies and sprites.
         `level`: Loads the level from a text file and a png file.
+        `preloader`: Loads the levels the menus can start in the background.
         `raycast`: Cast 2D rays that can be interpreted to create the pseudo-2D style walls.
     """
 
@@ -94,6 +99,15 @@ class Game:
         # flag for ctrl key
         self.ctrl: bool = False
 
+        # loads the next level while a menu is shown
+        self.preloader: LevelPreloader = LevelPreloader()
+
+        # the asset store scope of the loaded level
+        self.asset_scope: int = None
+
+        # how long the last restart after a death took, in milliseconds
+        self.restart_time: float = None
+
         # level timer
         self.start_time: datetime.datetime = None
         self.finish_time: datetime.datetime = None
@@ -113,7 +127,18 @@ class Game:
         # load the menu
         self.open_menu(MainMenu(self))
 
-    def play(self, level: str, died: bool = False) -> None:
+    def play(self, level: str, prepared: PreparedLevel = None) -> None:
+        # the images the preloader decoded are converted as they are asked for
+        if prepared is not None:
+            ASSETS.decoded.update(prepared.images)
+
+        # assets of the previous level are released once the new one is loaded, so the 
+        # ones both levels use are never reloaded
+        previous_scope = self.asset_scope
+        self.asset_scope = ASSETS.open_scope()
+        # the sprites of the previous level are dropped with their slots
+        ENTITIES.clear()
+
         # create the HUD renderer
         self.hud_renderer: HUDRenderer = HUDRenderer(self)
 
@@ -128,14 +153,18 @@ class Game:
         self.objects_manager: ObjectsManager = ObjectsManager(self)
 
         # load level
-        self.level: Level = Level(level, self)
+        self.level: Level = Level(level, self, prepared)
 
         # create the raycast engine
         self.raycast: Raycasting = Raycasting(self)
 
+        if previous_scope is not None:
+            ASSETS.release_scope(previous_scope)
+        # decoded images the level didn't use
+        ASSETS.decoded.clear()
+
         # counters
-        if not died:
-            self.deaths: int = 0
+        self.deaths: int = 0
         self.kills: int = 0
         self.shots_fired: int = 0
         self.shots_hit: int = 0
@@ -143,6 +172,33 @@ class Game:
         # start timer
         self.start_timer()
 
+    def restart(self) -> None:
+        """Start the loaded level over after the player died.
+
+        Only the player, the HUD and the entities are created again, the entities from the 
+        level's compiled spawns. The map, its pathfinding structures, the renderers and 
+        every loaded asset are kept.
+        """
+        start = time.perf_counter()
+
+        # the sprites of the last attempt are dropped with their slots
+        ENTITIES.clear()
+
+        self.hud_renderer = HUDRenderer(self)
+        self.player = Player(self)
+        self.player.set_weapon(self.player.inventory.weapons[0])
+        self.raycast.player = self.player
+
+        self.level.spawn()
+
+        self.kills = 0
+        self.shots_fired = 0
+        self.shots_hit = 0
+        self.start_timer()
+
+        # shown with the debug info, see `SHOW_DEBUG_INFO`
+        self.restart_time = (time.perf_counter() - start) * 1000
+
     def __frame(self) -> None:
         """Operations that should be ran in one frame in the main game loop.
 
@@ -218,7 +274,7 @@ class Game:
                 
                 if self.player.is_dead:
                     if event.key == pg.K_SPACE or event.key == pg.K_RETURN:
-                        self.play(self.level.lvl_name, died=True)
+                        self.restart()
                 elif event.key == pg.K_SPACE:
                     self.player.use_lever()
             
@@ -252,10 +308,37 @@ class Game:
             self.__frame()
     
     def new_game(self, level: str = "1") -> None:
+        prepared = None
+        job = self.preloader.take(level)
+        if job is not None:
+            # keep showing the menu until the preloader is done with the level
+            while not job.done():
+                if pg.event.get(pg.QUIT):
+                    self.quit()
+                    return
+                self.__draw_loading()
+            prepared = job.result()
+
         self.in_menu = False
-        self.play(level)
+        self.play(level, prepared=prepared)
         self.audio_manager.play_music(self.level.music_path)
 
+    def __draw_loading(self) -> None:
+        """Draw the menu dimmed, with a loading indicator over it, and wait for the next frame."""
+
+        self.menu.draw()
+
+        s = pg.Surface((WIN_WIDTH, WIN_HEIGHT))
+        s.set_alpha(160)
+        s.fill((0, 0, 0))
+        self.surface.blit(s, (0, 0))
+
+        text = hud_text.string_to_surface("loading...", "small", 7)
+        self.surface.blit(text, (WIN_HALF_WIDTH - text.get_width() // 2, WIN_HALF_HEIGHT - text.get_height() // 2))
+
+        pg.display.flip()
+        self.clock.tick(FPS)
+
     def __tick_delta(self) -> None:
         """
         Calculates the time between frames.
@@ -269,10 +352,11 @@ class Game:
         """
         Quits the game.
 
-        This method sets running to False, which stops the game loop.
+        This method sets running to False, which stops the game loop, and stops the preloader.
         """
         
         self.running = False
+        self.preloader.shutdown()
 
     def open_menu(self, menu: Menu) -> None:
         self.in_menu = True
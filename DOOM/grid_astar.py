@@ -0,0 +1,415 @@
+from typing import List, Tuple
+import heapq
+from array import array
+import math
+
+from config import *
+
+SQRT2: float = math.sqrt(2)
+# the estimated total cost of a queued cell is stored in a heap entry as an integer in
+# steps of 1 / KEY_SCALE, above the bits of the cell's index
+KEY_SCALE: float = float(1 << 30)
+# the remaining cost is weighted by this much in the estimated total cost, so between cells
+# of the same estimate the one closest to the target is expanded first. Small enough for
+# the paths to stay the shortest ones, path lengths a + b * sqrt(2) don't get that close
+TIE_BREAK: float = 1 + 1e-7
+
+# (dx, dy) of the 8 directions, straight ones first
+DIRECTIONS: List[Tuple[int, int]] = [(1, 0), (-1, 0), (0, 1), (0, -1), (1, 1), (-1, 1), (1, -1), (-1, -1)]
+# the two directions beside every straight direction
+SIDES: List[Tuple[int, int]] = [(2, 3), (2, 3), (0, 1), (0, 1)]
+
+
+class GridAStar:
+    """A* with jump point search over a flat occupancy grid.
+
+    The grid is a bytearray of `(width + 2) * (height + 2)` cells, row by row, with a
+    border of walls around the map, so neighbours never need a bounds check. A cell is
+    walkable when its byte is 0. Movement is in 8 directions, and diagonal steps are only
+    allowed when both cells beside the step are walkable, like the `only_when_no_obstacle`
+    rule of the pathfinding library this replaces.
+
+    Most shortest paths have many twins of the same length, that take the same steps in
+    another order. Jump point search only follows one of them: from every cell it goes on
+    in the direction it came from as long as nothing changes beside the path, and only
+    stops at jump points, the cells where a wall beside the path ends and a new direction
+    becomes worth taking. Only the jump points are queued and expanded, not every cell of
+    the open areas between them.
+
+    The first search after the grid changed prepares what every search reads from it:
+    - `jumps`, how far a search jumps from every cell in every direction, so a jump is
+      a lookup instead of a walk over the cells.
+    - The connected areas of the grid. A diagonal step needs both cells beside it, so
+      these are the areas connected by straight steps. A search for a target in another
+      area than the start fails right away, instead of expanding all of the start's area.
+    - The path lengths from a few landmark cells to every cell, see `ASTAR_LANDMARKS`. By
+      the triangle inequality, the remaining cost from a cell is at least the difference
+      of its path length and the target's from any landmark. Unlike the octile distance,
+      that estimate knows about walls, so far fewer cells are expanded around them. Every
+      search uses the landmark that tells its start and target furthest apart.
+
+    The per-cell search state is kept between searches and marked with the number of the
+    search that wrote it, so starting a new search doesn't need to clear anything. The
+    queue holds plain integers, the estimated total cost above the cell's index, so pushing
+    a cell doesn't build a tuple and comparing two is a single integer comparison.
+
+    Attributes:
+        `grid` (`bytearray`): The padded occupancy grid. Shared, not copied.
+        `width` (`int`): The width of the padded grid.
+        `height` (`int`): The height of the padded grid.
+        `search` (`int`): The number of the current search.
+        `prepared` (`bool`): Whether the jumps, areas and landmarks match the grid.
+        `jumps` (`list[list[int]]`): For every direction of `DIRECTIONS` and every cell, the
+            number of steps to the next jump point in that direction, or minus the number
+            of steps that can be taken before a wall when there is none.
+        `successors` (`list[list[tuple]]`): The directions to jump in from a cell, by how it
+            was reached: 4 entries for every straight direction, by the sides a wall beside
+            the path ended on, then one for every diagonal direction, then one for the start.
+            Every direction is (how a cell jumped to is reached, jumps, index offset, dx,
+            dy, step cost), how it is reached is the straight direction, to be looked up in
+            `straight_arrivals`, or the entry of the diagonal direction.
+        `straight_arrivals` (`list[list[int]]`): For every straight direction and every cell,
+            the entry of `successors` for a cell reached in that direction.
+        `areas` (`list[int]`): The connected area of every cell, 0 for walls.
+        `landmarks` (`list[list[float]]`): The path lengths from every landmark to every
+            cell, `math.inf` for cells of other areas. The landmarks are all in `landmark_area`.
+        `landmark_area` (`int`): The largest area, the one the landmarks are in.
+    """
+
+    def __init__(self, grid: bytearray, width: int, height: int) -> None:
+        self.grid: bytearray = grid
+        self.width: int = width
+        self.height: int = height
+
+        size = width * height
+        self.costs: List[float] = [0.0] * size
+        self.estimates: List[float] = [0.0] * size  # the remaining cost, found when opened
+        self.parents: List[int] = [0] * size
+        self.arrivals: List[int] = [0] * size  # how the cell was reached, see `successors`
+        self.opened: List[int] = [0] * size  # number of the search that reached the cell
+        self.closed: List[int] = [0] * size  # number of the search that expanded the cell
+        self.search: int = 0
+        # heap entries are the cell index in their lowest `index_bits` bits
+        self.index_bits: int = size.bit_length()
+
+        # map coordinates of every cell
+        self.xs: List[int] = [i % width - 1 for i in range(size)]
+        self.ys: List[int] = [i // width - 1 for i in range(size)]
+        self.cells: List[Tuple[int, int]] = list(zip(self.xs, self.ys))
+
+        self.prepared: bool = False
+        self.jumps: List[List[int]] = []
+        self.successors: List[List[tuple]] = []
+        self.straight_arrivals: List[List[int]] = []
+        self.areas: List[int] = []
+        self.landmarks: List[List[float]] = []
+        self.landmark_area: int = 0
+
+    def grid_changed(self) -> None:
+        """Prepare again before the next search, the grid was changed."""
+
+        self.prepared = False
+
+    def prepare(self) -> None:
+        """Find the jumps and connected areas of every cell, and the path lengths from the
+        landmarks, on the grid as it is now."""
+
+        self.prepare_jumps()
+        self.prepare_areas()
+        self.prepare_landmarks()
+        self.prepared = True
+
+    def prepare_jumps(self) -> None:
+        """Find how far a search jumps from every cell in every direction, and the
+        directions it goes on in from every cell."""
+
+        w, h = self.width, self.height
+        grid = self.grid
+        self.jumps = [[0] * (w * h) for _ in DIRECTIONS]
+        self.straight_arrivals = [[0] * (w * h) for _ in SIDES]
+
+        # every jump continues the jump from the next cell, so the cells are walked from
+        # the far end of each direction
+        for direction, (dx, dy) in enumerate(DIRECTIONS):
+            jumps = self.jumps[direction]
+            step = dx + dy * w
+            xs = range(w - 2, 0, -1) if dx > 0 else range(1, w - 1)
+            ys = range(h - 2, 0, -1) if dy > 0 else range(1, h - 1)
+
+            if not (dx and dy):
+                arrivals = self.straight_arrivals[direction]
+                # the cells beside the step, on the sides of `SIDES`
+                side = w if dx else 1
+                for y in ys:
+                    for x in xs:
+                        i = y * w + x
+                        n = i + step
+                        # the sides where a wall beside the path ends at the next cell
+                        ended = (grid[i + side] and not grid[n + side]) + 2 * (grid[i - side] and not grid[n - side])
+                        arrivals[n] = direction * 4 + ended
+                        if grid[n]:
+                            jumps[i] = 0
+                        elif ended:
+                            jumps[i] = 1
+                        else:
+                            jump = jumps[n]
+                            jumps[i] = jump + 1 if jump > 0 else jump - 1
+            else:
+                # diagonal jumps stop where a straight jump along one of their axes finds a
+                # jump point
+                jumps_x = self.jumps[DIRECTIONS.index((dx, 0))]
+                jumps_y = self.jumps[DIRECTIONS.index((0, dy))]
+                for y in ys:
+                    for x in xs:
+                        i = y * w + x
+                        n = i + step
+                        # no cutting corners
+                        if grid[n] or grid[i + dx] or grid[i + dy * w]:
+                            jumps[i] = 0
+                        elif jumps_x[n] > 0 or jumps_y[n] > 0:
+                            jumps[i] = 1
+                        else:
+                            jump = jumps[n]
+                            jumps[i] = jump + 1 if jump > 0 else jump - 1
+
+        # a search goes on straight ahead after a straight jump, and also sideways and
+        # diagonally ahead on the sides where a wall beside the path ended. After a diagonal
+        # jump, it goes on along the diagonal and straight ahead on both of its axes. From
+        # the start, it goes in every direction
+        directions = [(d if d < 4 else d + 12, self.jumps[d], dx + dy * w, dx, dy, SQRT2 if dx and dy else 1.0)
+                      for d, (dx, dy) in enumerate(DIRECTIONS)]
+        self.successors = []
+        for d, (dx, dy) in enumerate(DIRECTIONS[:4]):
+            for ended in range(4):
+                next_directions = [d]
+                for bit, side in enumerate(SIDES[d]):
+                    if ended >> bit & 1:
+                        side_x, side_y = DIRECTIONS[side]
+                        next_directions += [side, DIRECTIONS.index((dx + side_x, dy + side_y))]
+                self.successors.append([directions[n] for n in next_directions])
+        for d, (dx, dy) in enumerate(DIRECTIONS[4:], 4):
+            next_directions = [d, DIRECTIONS.index((dx, 0)), DIRECTIONS.index((0, dy))]
+            self.successors.append([directions[n] for n in next_directions])
+        self.successors.append(directions)
+
+    def prepare_areas(self) -> None:
+        """Find the connected areas of the grid."""
+
+        w = self.width
+        grid = self.grid
+        self.areas = areas = [0] * len(grid)
+        area = 0
+        for i in range(len(grid)):
+            if grid[i] or areas[i]:
+                continue
+            area += 1
+            areas[i] = area
+            stack = [i]
+            while stack:
+                cell = stack.pop()
+                for n in (cell + 1, cell - 1, cell + w, cell - w):
+                    if not grid[n] and not areas[n]:
+                        areas[n] = area
+                        stack.append(n)
+
+    def prepare_landmarks(self) -> None:
+        """Pick the landmarks in the largest area, and find the path lengths from them."""
+
+        self.landmarks = []
+        if not any(self.areas):
+            self.landmark_area = 0
+            return
+        area_sizes = [0] * (max(self.areas) + 1)
+        for area in self.areas:
+            area_sizes[area] += 1
+        area_sizes[0] = 0
+        self.landmark_area = area_sizes.index(max(area_sizes))
+
+        # every landmark is the cell furthest from the ones picked before, starting from
+        # the cell furthest from any cell of the area
+        nearest = self.path_lengths(self.areas.index(self.landmark_area))
+        cells = range(len(self.grid))
+        for _ in range(ASTAR_LANDMARKS):
+            landmark = max(cells, key=lambda i: nearest[i] if nearest[i] < math.inf else -1)
+            lengths = self.path_lengths(landmark)
+            self.landmarks.append(array('d', lengths))
+            nearest = list(map(min, nearest, lengths))
+
+    def path_lengths(self, source: int) -> List[float]:
+        """Get the path length from the cell `source` to every cell, with Dijkstra's algorithm.
+
+        Cells that can't be reached from `source` are `math.inf`.
+        """
+
+        w = self.width
+        grid = self.grid
+        # (index offset, cost, index offsets of the two cells beside the step) of every step
+        steps = [(dx + dy * w, SQRT2 if dx and dy else 1.0, dx, dy * w) for dx, dy in DIRECTIONS]
+
+        lengths = [math.inf] * len(grid)
+        lengths[source] = 0.0
+        queue = [(0.0, source)]
+        while queue:
+            length, i = heapq.heappop(queue)
+            if length > lengths[i]:
+                continue  # already reached through a shorter path
+            for step, step_cost, side_a, side_b in steps:
+                n = i + step
+                new_length = length + step_cost
+                # no cutting corners
+                if grid[n] or new_length >= lengths[n] or (side_a and side_b and (grid[i + side_a] or grid[i + side_b])):
+                    continue
+                lengths[n] = new_length
+                heapq.heappush(queue, (new_length, n))
+        return lengths
+
+    def find_path(self, start: Tuple[int, int], target: Tuple[int, int]) -> Tuple[List[Tuple[int, int]], int]:
+        """Find a shortest path from `start` to `target`.
+
+        Args:
+            start (tuple[int, int]): The starting cell, in map coordinates.
+            target (tuple[int, int]): The target cell, in map coordinates.
+
+        Returns:
+            tuple[list[tuple[int, int]], int]: The cells of the path from `start` to `target`
+                (empty if there is none), and the number of jump points the search expanded.
+        """
+        w = self.width
+        grid = self.grid
+
+        sx, sy = start
+        tx, ty = target
+        if not (0 <= sx < w - 2 and 0 <= sy < self.height - 2 and 0 <= tx < w - 2 and 0 <= ty < self.height - 2):
+            return [], 0
+        start_i = (sy + 1) * w + sx + 1
+        target_i = (ty + 1) * w + tx + 1
+        if grid[target_i]:
+            return [], 0
+
+        if not self.prepared:
+            self.prepare()
+        # a start inside a wall can still step out of it, into any area
+        if not grid[start_i] and self.areas[start_i] != self.areas[target_i]:
+            return [], 0
+
+        costs, estimates, parents, arrivals = self.costs, self.estimates, self.parents, self.arrivals
+        opened, closed = self.opened, self.closed
+        xs, ys = self.xs, self.ys
+        octile = SQRT2 - 2
+        successors, straight_arrivals = self.successors, self.straight_arrivals
+
+        # the landmark that tells the start and the target furthest apart, they only tell
+        # something about the area they are in
+        landmark = target_length = None
+        if self.areas[target_i] == self.landmark_area and not grid[start_i]:
+            furthest = -1.0
+            for lengths in self.landmarks:
+                difference = abs(lengths[start_i] - lengths[target_i])
+                if difference > furthest:
+                    landmark, target_length, furthest = lengths, lengths[target_i], difference
+
+        self.search += 1
+        search = self.search
+
+        costs[start_i] = 0.0
+        opened[start_i] = search
+        arrivals[start_i] = len(successors) - 1
+        index_bits = self.index_bits
+        index_mask = (1 << index_bits) - 1
+        queue = []
+        # cells queued before all of `queue`, the last one first, see below
+        next_cells = [start_i]
+        push, pop = heapq.heappush, heapq.heappop
+        expanded = 0
+
+        while next_cells or queue:
+            entry = next_cells.pop() if next_cells else pop(queue)
+            i = entry & index_mask
+            if closed[i] == search:
+                continue  # already expanded through a cheaper path
+            closed[i] = search
+            expanded += 1
+
+            if i == target_i:
+                return self.trace(start_i, target_i), expanded
+
+            cost = costs[i]
+            # steps to the target on either axis
+            rx = tx - xs[i]
+            ry = ty - ys[i]
+            arrival = arrivals[i]
+            if arrival < 4:
+                arrival = straight_arrivals[arrival][i]
+            for arrival, jumps, offset, dx, dy, step_cost in successors[arrival]:
+                jump = jumps[i]
+                # a jump stops early at the target, when it is straight ahead or, for a
+                # diagonal jump, when it passes the target's row or column
+                if dx and dy:
+                    ahead = rx * dx if rx * dx < ry * dy else ry * dy
+                elif dx:
+                    ahead = rx * dx if ry == 0 else 0
+                else:
+                    ahead = ry * dy if rx == 0 else 0
+                if 0 < ahead <= (jump if jump > 0 else -jump):
+                    jump = ahead
+                elif jump <= 0:
+                    continue  # a wall before any jump point
+                n = i + jump * offset
+
+                new_cost = cost + jump * step_cost
+                if opened[n] != search:
+                    opened[n] = search
+
+                    # octile distance to the target
+                    ex = xs[n] - tx
+                    ey = ys[n] - ty
+                    if ex < 0:
+                        ex = -ex
+                    if ey < 0:
+                        ey = -ey
+                    estimate = ex + ey + octile * (ey if ex > ey else ex)
+                    if landmark is not None:
+                        difference = landmark[n] - target_length
+                        if difference < 0:
+                            difference = -difference
+                        if difference > estimate:
+                            estimate = difference
+                    estimate *= TIE_BREAK
+                    estimates[n] = estimate
+                elif new_cost >= costs[n] or closed[n] == search:
+                    continue
+                else:
+                    estimate = estimates[n]
+
+                costs[n] = new_cost
+                parents[n] = i
+                arrivals[n] = arrival
+                new_entry = int((new_cost + estimate) * KEY_SCALE) << index_bits | n
+                # a cell estimated no further than the one being expanded is expanded before
+                # anything in the queue, along a straight path that's most of them. It skips
+                # the heap when it also comes before the other cells waiting for that
+                if new_entry <= entry and (not next_cells or new_entry <= next_cells[-1]):
+                    next_cells.append(new_entry)
+                else:
+                    push(queue, new_entry)
+
+        return [], expanded
+
+    def trace(self, start_i: int, target_i: int) -> List[Tuple[int, int]]:
+        """Follow the parents from the target back to the start, and return the path in map
+        coordinates, with the cells between the jump points."""
+
+        xs, ys, cells = self.xs, self.ys, self.cells
+        path = [cells[target_i]]
+        i = target_i
+        while i != start_i:
+            parent = self.parents[i]
+            # jumps are straight or diagonal lines
+            dx = xs[parent] - xs[i]
+            dy = ys[parent] - ys[i]
+            step = (dx > 0) - (dx < 0) + ((dy > 0) - (dy < 0)) * self.width
+            while i != parent:
+                i += step
+                path.append(cells[i])
+        path.reverse()
+        return path
@@ -2,7 +2,8 @@
 This module contains the implementation of the Level class, which represents a game level.
 
 The Level class loads a map from a PNG image file and a set of game objects and enemies from a text file.
-It also initializes the game player's position and rotation angle, as well as the sky texture used for rendering.
+Both are compiled into a `.lvl` file next to them, which is loaded instead while they don't change
+(see `compiled_level.py`). It also initializes the game player's position and rotation angle, as well as the sky texture used for rendering.
 
 Usage:
     from level import Level
@@ -10,21 +11,29 @@ Usage:
 """
 
 from __future__ import annotations
-from typing import TYPE_CHECKING
+from typing import TYPE_CHECKING, Tuple
 if TYPE_CHECKING:
     from game import Game
+    from player import Player
+    from level_preloader import PreparedLevel
 
 # import math
 import math
 
+import numpy as np
+
 # import other things
+from compiled_level import CompiledLevel, SPAWN, OBJECT as OBJECT_SPAWN, ENEMY as ENEMY_SPAWN, PICKUP as PICKUP_SPAWN
 from map import Map
-from png_map import PNGMap
+from png_map import PNGMap, RGB_TO_TEX
 from renderer.sprite_object import SpriteObject
 from renderer.objects_manager import OBJECTS
 from enemy import ENEMIES
 from pickup import PICKUPS
 
+# where the levels are
+MAP_DATA_DIR = "DOOM/resources/map_data/"
+
 # define keywords
 OBJECT = "object "
 OBJECT_END = "object end"
@@ -35,6 +44,148 @@ PICKUP_END = "pickup end"
 SKY = "sky "
 PLAYER = "player "
 
+# bump when `compile_level` changes what it makes of the same sources, so the levels compiled
+# before are compiled again
+COMPILER_VERSION = 1
+# identifies the compiler to the compiled levels, with the color table of the PNG maps
+COMPILER = f"{COMPILER_VERSION} {sorted(RGB_TO_TEX.items())}".encode()
+
+
+def load_compiled_level(path: str) -> CompiledLevel:
+    """
+    Loads the compiled form of the level at `path` (without extension), compiling it first 
+    if it is missing or out of date.
+    """
+
+    key = CompiledLevel.key(path, COMPILER)
+    level = CompiledLevel.load(path + ".lvl", key)
+    if level is None:
+        level = compile_level(path)
+        try:
+            level.save(path + ".lvl", key)
+        except OSError as e:
+            # e.g. a read-only install, the level is compiled again the next time
+            print(f"Couldn't save the compiled level to {path}.lvl: {e}")
+    return level
+
+
+def compile_level(path: str) -> CompiledLevel:
+    """
+    Parses the level file and decodes the PNG map of the level at `path` (without extension).
+
+    Raises:
+        Exception: when the map file read is not in a correct format.
+    """
+
+    # read the level file
+    with open(path + ".txt", "r") as f:
+        lines = f.read().split("\n")
+
+    object_name = None
+    enemy_name = None
+    pickup_name = None
+    sky_name = None
+    player_pos = None
+    player_rot = 0
+
+    # the kind, name and position of everything to spawn, and the names
+    spawns = []
+    spawn_names = []
+
+    def spawn(kind: int, name: str, line: str) -> None:
+        x, y = line.strip().split()
+        if name not in spawn_names:
+            spawn_names.append(name)
+        spawns.append((kind, spawn_names.index(name), float(x), float(y)))
+
+    # go through all lines of the file
+    for line in lines:
+        # ignore empty or comment (#) lines
+        if len(line) == 0 or line.startswith("#"):
+            continue
+
+        # if user is ending an object definition
+        if line == OBJECT_END:
+            if object_name is None:
+                raise Exception("No object definition to end!")
+
+            object_name = None
+            continue
+
+        # user is starting an object definition
+        if line.startswith(OBJECT):
+            object_name = line[len(OBJECT):]
+            if object_name not in OBJECTS:
+                raise Exception(f"No object named '{object_name}' found!")
+            continue
+
+        # user is ending a pickup definition
+        if line == PICKUP_END:
+            if pickup_name is None:
+                raise Exception("No pickup def to end")
+
+            pickup_name = None
+            continue
+
+        if line.startswith(PICKUP):
+            pickup_name = line[len(PICKUP):]
+            if not PICKUPS.has(pickup_name):
+                raise Exception(f"No pickup named '{pickup_name}'")
+            continue
+
+        # object is setting player position and rotation
+        if line.startswith(PLAYER):
+            if player_pos is not None:
+                raise Exception("Cannot define player spawn pos twice!")
+            p = line[len(PLAYER):].split()
+            player_pos = float(p[0]), float(p[1])
+            player_rot = math.radians(float(p[2]) + 85)
+            continue
+
+        # during an object definition
+        if object_name:
+            spawn(OBJECT_SPAWN, object_name, line)
+            continue
+
+        # ending an enemy definition
+        if line == ENEMY_END:
+            enemy_name = None
+            continue
+
+        # starting an enemy definition
+        if line.startswith(ENEMY):
+            if enemy_name is not None:
+                raise Exception("Didn't end enemy def!")
+
+            enemy_name = line[len(ENEMY):]
+            if not ENEMIES.has(enemy_name):
+                raise Exception(f"No enemy named '{enemy_name}'!")
+
+            continue
+
+        # setting sky texture
+        if line.startswith(SKY):
+            if sky_name is not None:
+                raise Exception("Already defined sky!")
+
+            sky_name = line[len(SKY):]
+
+        # during an enemy definition
+        if enemy_name:
+            spawn(ENEMY_SPAWN, enemy_name, line)
+            continue
+
+        # during a pickup def
+        if pickup_name:
+            spawn(PICKUP_SPAWN, pickup_name, line)
+            continue
+
+    png_map = PNGMap(path + ".png")
+    tex_ids, tex_names = png_map.to_texture_ids()
+
+    return CompiledLevel(tex_ids, tex_names, np.array(spawns, dtype=SPAWN), spawn_names, sky_name, player_pos,
+                         player_rot, png_map.next_level)
+
 
 class Level:
     """
@@ -44,27 +195,32 @@ class Level:
         `path` (str): The path to the level file.
         `game` (Game): The game object.
         `objects_manager` (ObjectsManager): The game's objects manager.
-        `png_map` (PNGMap): The PNG map object.
         `map` (Map): The map object.
+        `next_level` (tuple[int, int]): The cell of the lever that ends the level, or None.
+        `compiled` (CompiledLevel): The loaded level, entities are spawned from it.
         `sprite_objects` (list[SpriteObject]): The list of sprite objects.
     """
 
-    def __init__(self, path: str, game: Game) -> None:
+    def __init__(self, path: str, game: Game, prepared: PreparedLevel = None) -> None:
         """
         Constructs a Level object.
 
         Args:
             path (str): The path to the level file.
             game (Game): The game object.
+            prepared (PreparedLevel, optional): The level as loaded by the preloader, if it was.
         """
 
         self.lvl_name: str = path
-        self.path: str = "DOOM/resources/map_data/" + path
+        self.path: str = MAP_DATA_DIR + path
         self.game: Game = game
         self.objects_manager = game.objects_manager
 
-        self.png_map: PNGMap = PNGMap(self.path + ".png")
+        self.prepared: PreparedLevel = prepared
         self.map: Map = Map()
+        self.next_level: Tuple[int, int] = None
+        # what the level starts from, kept to restart it
+        self.compiled: CompiledLevel = None
         self.sprite_objects: list[SpriteObject] = []
 
         self.music_path: str = f"DOOM/resources/audio/music/{self.lvl_name}.mp3"
@@ -75,125 +231,67 @@ class Level:
     
     def load(self) -> None:
         """
-        Loads the level file.
+        Loads the level, from its compiled form if it is up to date, or else compiles it 
+        from the level file and the PNG map first. If the level was prepared by the 
+        preloader, its compiled form and map are taken from there.
 
         Raises:
             Exception: when the map file read is not in a correct format.
         """
 
-        self.objects_manager.enemies = []
-        self.objects_manager.objects = []
-        self.objects_manager.pickups = []
-
-        # read the level file
-        with open(self.path + ".txt", "r") as f:
-            lines = f.read().split("\n")
-
-        object_name = None
-        enemy_name = None
-        pickup_name = None
-        sky_name = None
-        player_pos = None
-
-        # go through all lines of the file
-        for lineno, line in enumerate(lines):
-            print("Read ln", lineno + 1, "\t:", line)
-
-            # ignore empty or comment (#) lines
-            if len(line) == 0 or line.startswith("#"):
-                continue
-
-            # if user is ending an object definition
-            if line == OBJECT_END:
-                if object_name is None:
-                    raise Exception("No object definition to end!")
-
-                object_name = None
-                continue
-
-            # user is starting an object definition
-            if line.startswith(OBJECT):
-                object_name = line[len(OBJECT):]
-                if object_name not in OBJECTS:
-                    raise Exception(f"No object named '{object_name}' found!")
-                continue
-
-            # user is ending a pickup definition
-            if line == PICKUP_END:
-                if pickup_name is None:
-                    raise Exception("No pickup def to end")
-
-                pickup_name = None
-                continue
-
-            if line.startswith(PICKUP):
-                pickup_name = line[len(PICKUP):]
-                if not PICKUPS.has(pickup_name):
-                    raise Exception(f"No pickup named '{pickup_name}'")
-                continue
-
-            # object is setting player position and rotation
-            if line.startswith(PLAYER):
-                if player_pos is not None:
-                    raise Exception("Cannot define player spawn pos twice!")
-                p = line[len(PLAYER):].split()
-                player_pos = float(p[0]), float(p[1])
-                player_rot = math.radians(float(p[2]) + 85)
-                continue
-
-            # during an object definition
-            if object_name:
-                obj_x, obj_y = line.strip().split()
-                obj_x, obj_y = float(obj_x), float(obj_y)
-                self.objects_manager.add_sprite(OBJECTS[object_name].make_at_position(self.game, (float(obj_x), float(obj_y))))
-                continue
-
-            # ending an enemy definition
-            if line == ENEMY_END:
-                enemy_name = None
-                continue
-
-            # starting an enemy definition
-            if line.startswith(ENEMY):
-                if enemy_name is not None:
-                    raise Exception(f"Didn't end enemy def!")
-
-                enemy_name = line[len(ENEMY):]
-                if not ENEMIES.has(enemy_name):
-                    raise Exception(f"No enemy named '{enemy_name}'!")
-                
-                continue
-
-            # setting sky texture
-            if line.startswith(SKY):
-                if sky_name is not None:
-                    raise Exception(f"Already defined sky!")
-                
-                sky_name = line[len(SKY):]
-
-            # during an enemy definition
-            if enemy_name:
-                enemy_x, enemy_y = line.strip().split()
-                enemy_x, enemy_y = float(enemy_x), float(enemy_y)
-                self.objects_manager.add_enemy(ENEMIES.get(enemy_name)(self.game, (enemy_x, enemy_y)))
-                continue
-
-            # during a pickup def
-            if pickup_name:
-                pu_x, pu_y = line.strip().split()
-                pu_x, pu_y = float(pu_x), float(pu_y)
-                self.objects_manager.add_pickup(PICKUPS.get(pickup_name)(self.game, (pu_x, pu_y)))
-                continue
-        
-        self.map.load(self.png_map.to_map())
-        if player_pos:
-            self.game.player.x, self.game.player.y = player_pos
-            self.game.player.angle = player_rot
-            print(f"PLAYER SPAWN SET: {player_pos}, ROTATION: {player_rot}")
-        if sky_name:
-            self.game.object_renderer.load_sky_texture(sky_name)
-            print(f"LOADED SKY TEXTURE: {sky_name}")
-        
-        self.total_enemies = len(self.objects_manager.enemies)
+        if self.prepared is not None:
+            # compiled and set up by the preloader
+            level = self.prepared.compiled
+            self.map = self.prepared.map
+            self.prepared = None
+        else:
+            level = load_compiled_level(self.path)
+            self.map.load_texture_ids(level.tex_ids, level.tex_names)
+            self.map.load_pvs(self.path + ".pvs")
+        self.compiled = level
+
+        self.next_level = level.next_level
+        self.game.object_renderer.load_map_textures(self.map.tex_names)
+        if level.sky_name:
+            self.game.object_renderer.load_sky_texture(level.sky_name)
+            print(f"LOADED SKY TEXTURE: {level.sky_name}")
+
+        self.spawn()
 
         print("Level loaded!")
+
+    def spawn(self) -> None:
+        """
+        Puts the player and every entity of the level at their starting positions, from the 
+        compiled level. Called again by `Game.restart` to start the level over.
+        """
+
+        self.objects_manager.clear()
+
+        # spawn everything in the order of the level file
+        level = self.compiled
+        names = level.spawn_names
+        for kind, name, x, y in level.spawns.tolist():
+            position = x, y
+            if kind == OBJECT_SPAWN:
+                self.objects_manager.add_sprite(OBJECTS[names[name]].make_at_position(self.game, position))
+            elif kind == ENEMY_SPAWN:
+                self.objects_manager.add_enemy(ENEMIES.get(names[name])(self.game, position))
+            else:
+                self.objects_manager.add_pickup(PICKUPS.get(names[name])(self.game, position))
+
+        if level.player_pos:
+            self.game.player.x, self.game.player.y = level.player_pos
+            self.game.player.angle = level.player_rot
+            print(f"PLAYER SPAWN SET: {level.player_pos}, ROTATION: {level.player_rot}")
+
+        self.total_enemies = len(self.objects_manager.enemies)
+
+    def can_use_lever(self, player: Player) -> bool:
+        """Check whether `player` is next to the lever that ends the level."""
+
+        if self.next_level is None:
+            return False
+        pgx, pgy = player.grid_position
+        nlx, nly = self.next_level
+        return abs(pgx - nlx) <= 1 and abs(pgy - nly) <= 1
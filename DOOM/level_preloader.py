@@ -0,0 +1,136 @@
+"""Loads the next level in the background while a menu is shown.
+
+Picking a level used to load it all at once: the level file is parsed (or its compiled
+form mapped), the map's grids and pathfinding structures are built and every wall and
+sprite image is decoded, while the menu froze. The `LevelPreloader` does all of that on
+a worker thread as soon as a menu that can start a level is opened, so starting it only
+takes what has to be done on the main thread.
+
+Images are only decoded on the worker: converting them to the window's pixel format, and
+everything else that touches the display, stays on the main thread. The decoded Surfaces
+are handed to the `AssetStore`, which converts them when they are asked for instead of
+reading their files. They are scaled after the conversion like before, scaling them first
+only moves the cost to the conversion of the bigger images.
+
+Usage:
+    game.preloader.preload("1")
+    ...
+    future = game.preloader.take("1")
+    game.play("1", future.result())
+"""
+
+from __future__ import annotations
+from typing import Dict, List
+
+import os
+from concurrent.futures import Future, ThreadPoolExecutor
+
+import pygame as pg
+
+from config import *
+from compiled_level import CompiledLevel
+from level import MAP_DATA_DIR, load_compiled_level
+from map import Map
+from renderer.asset_store import ASSETS
+
+# where the images a level may need are, the sky is added by the level
+WALLS_DIR = "DOOM/resources/textures/walls"
+SPRITES_DIR = "DOOM/resources/textures/sprites"
+SKIES_DIR = "DOOM/resources/textures/skies"
+
+
+class PreparedLevel:
+    """A level loaded by the preloader, everything `Level` needs that isn't a game object.
+
+    Attributes:
+        `compiled` (`CompiledLevel`): The compiled level.
+        `map` (`Map`): The map, with its grids, pathfinding structures and PVS set up.
+        `images` (`dict[str, pg.Surface]`): The decoded images that weren't loaded yet, by
+            path. They are not converted to the window's pixel format.
+    """
+
+    def __init__(self, compiled: CompiledLevel, level_map: Map, images: Dict[str, pg.Surface]) -> None:
+        self.compiled: CompiledLevel = compiled
+        self.map: Map = level_map
+        self.images: Dict[str, pg.Surface] = images
+
+
+def prepare_level(name: str, image_paths: List[str]) -> PreparedLevel:
+    """Load the level `name` and decode the images at `image_paths`, on a worker thread."""
+
+    path = MAP_DATA_DIR + name
+    compiled = load_compiled_level(path)
+
+    level_map = Map()
+    level_map.load_texture_ids(compiled.tex_ids, compiled.tex_names)
+    level_map.load_pvs(path + ".pvs")
+
+    # the sky is only known once the level is loaded
+    if compiled.sky_name:
+        image_paths = image_paths + [f"{SKIES_DIR}/{compiled.sky_name}.png"]
+    images = {image_path: pg.image.load(image_path) for image_path in image_paths}
+
+    return PreparedLevel(compiled, level_map, images)
+
+
+class LevelPreloader:
+    """Prepares levels on a pool of worker threads.
+
+    Attributes:
+        `executor` (`ThreadPoolExecutor`): The worker threads.
+        `jobs` (`dict[str, Future]`): The levels being or done being prepared, by name,
+            until one of them is taken.
+    """
+
+    def __init__(self) -> None:
+        self.executor: ThreadPoolExecutor = ThreadPoolExecutor(PRELOAD_WORKERS, thread_name_prefix="preload")
+        self.jobs: Dict[str, Future] = {}
+
+    def preload(self, name: str) -> None:
+        """Start preparing the level `name`, unless it already is or it doesn't exist."""
+
+        if name in self.jobs or not os.path.isfile(MAP_DATA_DIR + name + ".txt"):
+            return
+        self.jobs[name] = self.executor.submit(prepare_level, name, self.missing_images())
+
+    def take(self, name: str) -> Future:
+        """Get the job preparing the level `name`, or None if it wasn't preloaded, when the
+        level starts. The other levels are dropped: they hold a map and images of their
+        own, and their list of images to decode goes out of date once a level runs.
+
+        Its result is a `PreparedLevel`, and raises whatever loading the level raised.
+        """
+        job = self.jobs.pop(name, None)
+        for other in self.jobs.values():
+            # the ones already running finish, and are freed with their result
+            other.cancel()
+        self.jobs.clear()
+        return job
+
+    def shutdown(self) -> None:
+        """Stop the workers, without waiting for the levels being prepared."""
+
+        self.executor.shutdown(wait=False, cancel_futures=True)
+        self.jobs.clear()
+
+    @staticmethod
+    def missing_images() -> List[str]:
+        """Get the wall and sprite images that are neither loaded nor in the atlas.
+
+        Done on the main thread, as the asset store isn't shared with the workers.
+        """
+        atlas = ASSETS.get_atlas()
+
+        paths = []
+        for file_name in os.listdir(WALLS_DIR):
+            path = WALLS_DIR + "/" + file_name
+            if ("texture", path, (TEX_SIZE, TEX_SIZE)) not in ASSETS.assets \
+                    and not (atlas is not None and atlas.has(path, (TEX_SIZE, TEX_SIZE))):
+                paths.append(path)
+
+        for directory, _, file_names in os.walk(SPRITES_DIR):
+            for file_name in file_names:
+                path = directory + "/" + file_name
+                if ("image", path, 1) not in ASSETS.assets and not (atlas is not None and atlas.has(path)):
+                    paths.append(path)
+        return paths
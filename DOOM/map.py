@@ -1,22 +1,47 @@
 from typing import List, Tuple
-from pathfinding.core.diagonal_movement import DiagonalMovement
-from pathfinding.core.grid import Grid
-from pathfinding.finder.a_star import AStarFinder
+from array import array
+import numpy as np
+
+from config import ENEMY_PATHFINDING, PVS_MAX_CELLS
+from grid_astar import GridAStar
+from flow_field import FlowField
+from path_cache import PathCache
+from pvs import PVS
 
 
 class Map:
     def __init__(self) -> None:
-        self.map: List[List[str]] = []
+        # the rows of texture names, see `map`
+        self._map: List[List[str]] = []
         self.height: int = 0
         self.width: int = 0
 
-        self.pathfind_grid: Grid = None
-        self.pathfinder: AStarFinder = AStarFinder(
-            diagonal_movement=DiagonalMovement.only_when_no_obstacle)
+        # compact copies of the map used by the batched raycaster
+        self.solid: np.ndarray = None
+        self.tex_ids: np.ndarray = None
+        self.tex_names: List[str] = []
+        self.tex_name_to_id: dict[str, int] = {}
+
+        # the occupancy grid with a border of walls, as a flat bytearray (1 for walls), and 
+        # the width of its rows
+        self.grid: bytearray = bytearray()
+        self.grid_width: int = 2
+        # `tex_ids` laid out like `grid`, for looking up single cells from python
+        self.tex_grid: array = array("H")
+
+        self.pathfinder: GridAStar = None
+        self.flow_field: FlowField = FlowField(self)
+        self.path_cache: PathCache = PathCache()
+
+        # the cells visible from every cell, see `load_pvs`
+        self.pvs: PVS = None
+
+        # bumped every time the grid changes, so everything derived from it can be rebuilt
+        self.version: int = 0
 
     def load(self, map_matrix: List[List[str]]) -> None:
-        """From the given 2D list representation of the map, load the pathfinding 2D list 
-        in the format required by the pathfinding library.
+        """From the given 2D list representation of the map, load the occupancy grids used 
+        for pathfinding and raycasting.
 
         Args:
             map (list[list[str]]): The original 2D map with texture names representing 
@@ -26,19 +51,131 @@ class Map:
         self.height = len(self.map)
         self.width = max(len(row) for row in self.map)
 
-        grid = []
+        self.load_arrays()
+        self.load_grids()
+
+    def load_texture_ids(self, tex_ids: np.ndarray, tex_names: List[str]) -> None:
+        """Load the map from a grid of texture ids, like the ones `PNGMap.to_texture_ids` 
+        decodes, without going through the rows of texture names.
+
+        Args:
+            tex_ids (np.ndarray): The (height, width) grid of indices into `tex_names`.
+            tex_names (list[str]): The texture names, "EMPTY" first for empty cells.
+        """
+        self.height, self.width = tex_ids.shape
+        self.tex_names = list(tex_names)
+        self.tex_name_to_id = {name: i for i, name in enumerate(self.tex_names)}
+        self.tex_ids = tex_ids.astype(np.int32)
+        # the rows of texture names are only built if they are used
+        self._map = None
+
+        self.load_grids()
+
+    @property
+    def map(self) -> List[List[str]]:
+        """The map as rows of texture names, with space for empty cells."""
+
+        if self._map is None:
+            self._map = np.array([" "] + self.tex_names[1:])[self.tex_ids].tolist()
+        return self._map
+
+    @map.setter
+    def map(self, map_matrix: List[List[str]]) -> None:
+        self._map = map_matrix
+
+    def load_arrays(self) -> None:
+        """Build the array representation of the map from its rows of texture names.
+
+        `tex_ids` holds an index into `tex_names` for every cell. Index 0 is reserved for empty cells and maps to the 
+        "EMPTY" texture, so a ray that never hits a wall still has a texture to draw.
+        """
+        self.tex_names = ["EMPTY"]
+        self.tex_name_to_id = {"EMPTY": 0}
+
+        self.tex_ids = np.zeros((self.height, self.width), dtype=np.int32)
         for row in range(self.height):
-            g_row = []
-            for col in range(self.width):
-                if col > len(self.map[row]) - 1:
-                    g_row.append(1)
-                else:
-                    if self.map[row][col] == " ":
-                        g_row.append(1)
-                    else:
-                        g_row.append(0)
-            grid.append(g_row)
-        self.pathfind_grid = Grid(matrix=grid)
+            for col, cell in enumerate(self.map[row]):
+                if cell == " ":
+                    continue
+                if cell not in self.tex_name_to_id:
+                    self.tex_name_to_id[cell] = len(self.tex_names)
+                    self.tex_names.append(cell)
+                self.tex_ids[row, col] = self.tex_name_to_id[cell]
+
+    def load_grids(self) -> None:
+        """Derive the occupancy grids and the pathfinding structures from `tex_ids`.
+
+        `solid` is a boolean grid that is True for walls, `grid` and `tex_grid` are its 
+        flat padded forms.
+        """
+
+        self.solid = self.tex_ids != 0
+
+        # cells past the end of shorter rows are empty, the border is solid
+        self.grid_width = self.width + 2
+        self.grid = bytearray(np.pad(self.solid, 1, constant_values=True).astype(np.uint8).tobytes())
+        self.tex_grid = array("H", np.pad(self.tex_ids, 1).astype(np.uint16).tobytes())
+
+        self.pathfinder = GridAStar(self.grid, self.grid_width, self.height + 2)
+        # otherwise prepared by the first search, if there is one
+        if ENEMY_PATHFINDING == "astar":
+            self.pathfinder.prepare()
+        self.flow_field = FlowField(self)
+        self.version += 1
+
+    def set_cell(self, x: int, y: int, cell: str) -> None:
+        """Change the cell at x,y, keeping every representation of the grid in sync.
+
+        Args:
+            x (int): The x (column) of the cell to change.
+            y (int): The y (row) of the cell to change.
+            cell (str): The texture name of the new wall, or space for an empty cell.
+
+        Raises:
+            IndexError: when x,y is out of the map, which can't grow.
+        """
+        if not (0 <= x < self.width and 0 <= y < self.height):
+            raise IndexError(f"Cell {x},{y} is out of the {self.width}x{self.height} map")
+
+        row = self.map[y]
+        # rows loaded shorter than the map are padded
+        if x >= len(row):
+            row.extend(" " * (x + 1 - len(row)))
+        row[x] = cell
+
+        i = (y + 1) * self.grid_width + x + 1
+        self.grid[i] = cell != " "
+        self.pathfinder.grid_changed()
+
+        if cell != " " and cell not in self.tex_name_to_id:
+            self.tex_name_to_id[cell] = len(self.tex_names)
+            self.tex_names.append(cell)
+        self.tex_ids[y, x] = self.tex_grid[i] = self.tex_name_to_id[cell] if cell != " " else 0
+        self.solid[y, x] = cell != " "
+        # built for the grid as it was
+        self.pvs = None
+
+        self.version += 1
+
+    def load_pvs(self, path: str) -> None:
+        """Load the potentially visible sets of the map from `path`, building them first if 
+        the file is missing or out of date. Maps bigger than `PVS_MAX_CELLS` get none."""
+
+        if self.width * self.height > PVS_MAX_CELLS:
+            # anything may be visible, see `visible_cells`
+            self.pvs = None
+            return
+        if not PVS.is_current(self, path):
+            print(f"Building the potentially visible sets of the map into {path}...")
+        self.pvs = PVS.load_or_build(self, path)
+
+    def visible_cells(self, cell: Tuple[int, int]) -> np.ndarray or None:
+        """Get a boolean grid of the cells that may be visible from `cell`, or None if that 
+        isn't known and anything may be visible."""
+
+        if self.pvs is None:
+            return None
+        return self.pvs.visible_from(cell)
 
     def unoccupied(self, x: int, y: int) -> bool:
         """Checks whether or not the cell at x,y is unoccupied.
@@ -51,17 +188,26 @@ class Map:
             bool: True if unoccupied, False otherwise.
         """
         if 0 <= x < self.width and 0 <= y < self.height:
-            try:
-                return self.map[y][x] == " "
-            except IndexError:
-                return True
+            return not self.grid[(y + 1) * self.grid_width + x + 1]
 
         return True
 
+    def texture_id(self, x: int, y: int) -> int:
+        """Get the id of the texture of the cell at x,y, an index into `tex_names`. 0 for 
+        empty cells and cells out of the map."""
+
+        if 0 <= x < self.width and 0 <= y < self.height:
+            return self.tex_grid[(y + 1) * self.grid_width + x + 1]
+
+        return 0
+
     def astar_next(self, start: Tuple[int, int], target: Tuple[int, int])\
           -> Tuple[int, int] or None:
         """Using the A* algorithm, find the next step to go to when pathfinding towards `target`.
 
+        Found paths are cached until the grid changes, and a lookup from any cell on a 
+        cached path to the same target reuses the rest of it (see `PathCache`).
+
         Args:
             start (tuple[int, int]): The starting position of the pathfinder, in grid units.
             target (tuple[int, int]): The target position to pathfind to, in grid units.
@@ -70,14 +216,28 @@ class Map:
             tuple[int, int] or None: The next grid to go to, or None if the algorithm could not 
                 find a valid path to `target` on the grid.
         """
-        self.pathfind_grid.cleanup()
-
-        n_start = self.pathfind_grid.node(*start)
-        n_end = self.pathfind_grid.node(*target)
+        cached = self.path_cache.get(start, target, self.version)
+        if cached is None:
+            path, expanded = self.pathfinder.find_path(start, target)
+            self.path_cache.add(start, target, path, expanded)
+            cached = path, 0
 
-        path, _ = self.pathfinder.find_path(n_start, n_end, self.pathfind_grid)
-        if len(path) <= 1:
+        path, i = cached
+        if path is None or i + 1 >= len(path):
             return None
-        return path[1]
-        # print('operations:', runs, 'path length:', len(path))
-        # print(self.pathfind_grid.grid_str(path=path, start=n_start, end=n_end))
+        return path[i + 1]
+
+    def flow_next(self, start: Tuple[int, int], target: Tuple[int, int])\
+          -> Tuple[int, int] or None:
+        """Using the flow field towards `target`, find the next step to go to when pathfinding 
+        towards it. The field is shared, and only rebuilt when `target` changes.
+
+        Args:
+            start (tuple[int, int]): The starting position of the pathfinder, in grid units.
+            target (tuple[int, int]): The target position to pathfind to, in grid units.
+
+        Returns:
+            tuple[int, int] or None: The next grid to go to, or None if there is no valid 
+                path to `target` on the grid.
+        """
+        return self.flow_field.next_step(start, target)
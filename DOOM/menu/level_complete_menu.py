@@ -14,20 +14,25 @@ class Continue(Button):
         menu.switch_page(menu.options_page)
 
 
-class NextLevel(Button):
-    def __init__(self):
-        super().__init__(None, 250, "next level")
+class LevelButton(Button):
+    """A button that starts the level `level`."""
+
+    def __init__(self, y: int, text: str, level: str):
+        super().__init__(None, y, text)
+        self.level: str = level
     
     def on_click(self, menu: Menu):
-        menu.game.new_game(str(int(menu.game.level.lvl_name) + 1))
+        menu.game.new_game(self.level)
+
+
+class NextLevel(LevelButton):
+    def __init__(self, level: str):
+        super().__init__(250, "next level", str(int(level) + 1))
 
 
-class RestartLevel(Button):
+class RestartLevel(LevelButton):
     def __init__(self):
-        super().__init__(None, 350, "restart level")
-    
-    def on_click(self, menu: Menu):
-        menu.game.new_game()
+        super().__init__(350, "restart level", "1")
 
 
 class MainMenu(Button):
@@ -59,7 +64,7 @@ class LevelCompleteMenu(Menu):
             ]
         )
         self.options_page = MenuPage(
-            ([NextLevel()] if game.level.lvl_name == "1" else []) +
+            ([NextLevel(game.level.lvl_name)] if game.level.lvl_name == "1" else []) +
             [
                 RestartLevel(),
                 MainMenu(),
@@ -67,3 +72,8 @@ class LevelCompleteMenu(Menu):
             ], []
         )
         super().__init__(game, background, self.summary_page, game.audio_manager.level_complete_music_path)
+
+        # load the levels the player can pick while the summary is read
+        for button in self.options_page.buttons:
+            if isinstance(button, LevelButton):
+                game.preloader.preload(button.level)
@@ -116,3 +116,6 @@ class MainMenu(Menu):
             Text("choose skill level:", None, 200, 5)
         ], default_button_idx=2)
         super().__init__(game, background, self.main_page, game.audio_manager.title_music_path)
+
+        # every difficulty starts the first level, load it while the player picks one
+        game.preloader.preload("1")
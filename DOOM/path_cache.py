@@ -0,0 +1,107 @@
+from collections import OrderedDict
+from typing import Dict, List, Tuple
+
+from config import *
+
+
+class PathCache:
+    """Remembers the paths found by A*, so the same search isn't run again every frame.
+
+    Every cell of a cached path knows where it is on the path. Any part of a shortest path
+    is itself a shortest path, so a lookup from a cell that lies on a cached path to the
+    same target reuses the rest of that path, even if the search started somewhere else.
+    Searches that found no path are remembered too.
+
+    The targets are the cells the player was in, and only the paths to the last 
+    `max_targets` of them are kept.
+
+    Attributes:
+        `paths` (`OrderedDict[tuple[int, int], dict[tuple[int, int], tuple]]`): By target,
+            least recently used first, then by start cell, the cached path and the index
+            of the start cell in it. The path is None when there is no path from the start
+            cell.
+        `max_targets` (`int`): The number of targets paths are kept for.
+        `version` (`int`): The version of the map grid the paths were found on.
+        `hits` (`int`): The number of lookups answered from the cache.
+        `misses` (`int`): The number of lookups that needed a search.
+        `expanded` (`int`): The total number of nodes expanded by the searches.
+    """
+
+    def __init__(self, max_targets: int = PATH_CACHE_TARGETS) -> None:
+        self.paths: OrderedDict[Tuple[int, int], Dict[Tuple[int, int], tuple]] = OrderedDict()
+        self.max_targets: int = max_targets
+        self.version: int = 0
+
+        self.hits: int = 0
+        self.misses: int = 0
+        self.expanded: int = 0
+
+    def get(self, start: Tuple[int, int], target: Tuple[int, int], version: int)\
+          -> Tuple[List[Tuple[int, int]], int] or None:
+        """Look up the path from `start` to `target`.
+
+        Args:
+            start (tuple[int, int]): The starting cell.
+            target (tuple[int, int]): The target cell.
+            version (int): The current version of the map grid. Everything cached for an
+                older version is dropped.
+
+        Returns:
+            tuple[list[tuple[int, int]], int] or None: The cached path and the index of
+                `start` in it (the path is None if there is no path), or None if nothing
+                is cached for `start` and `target`.
+        """
+        if version != self.version:
+            self.clear()
+            self.version = version
+
+        cells = self.paths.get(target)
+        entry = cells.get(start) if cells is not None else None
+        if entry is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+            self.paths.move_to_end(target)
+        return entry
+
+    def add(self, start: Tuple[int, int], target: Tuple[int, int],
+            path: List[Tuple[int, int]], expanded: int) -> None:
+        """Store the path found from `start` to `target`.
+
+        Args:
+            start (tuple[int, int]): The starting cell.
+            target (tuple[int, int]): The target cell.
+            path (list[tuple[int, int]]): The cells of the path, from `start` to `target`.
+                Empty if there is no path.
+            expanded (int): The number of nodes the search expanded.
+        """
+        self.expanded += expanded
+
+        cells = self.paths.get(target)
+        if cells is None:
+            cells = self.paths[target] = {}
+            if len(self.paths) > self.max_targets:
+                self.paths.popitem(last=False)
+        self.paths.move_to_end(target)
+
+        if not path:
+            cells[start] = None, 0
+            return
+        for i, cell in enumerate(path):
+            cells[cell] = path, i
+
+    def clear(self) -> None:
+        self.paths.clear()
+
+    def stats(self) -> Dict[str, float]:
+        """Get the counters of the cache, for inspecting how well it works."""
+
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0,
+            "avg_expanded": self.expanded / self.misses if self.misses else 0,
+            "targets": len(self.paths),
+            "cells": sum(len(cells) for cells in self.paths.values())
+        }
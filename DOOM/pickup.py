@@ -34,10 +34,6 @@ class Pickup(SpriteObject):
 
         self.deleted: bool = False
     
-    def update(self) -> None:
-        super().update()
-        self.check_pick_up()
-    
     def pick_up(self) -> bool:
         """
         Function that should be implemented by children classes. Defines action when this is picked up.
@@ -50,7 +46,8 @@ class Pickup(SpriteObject):
     def check_pick_up(self) -> None:
         """Check if this item can be picked up.
 
-        If the item was picked up, set the `deleted` property to True.
+        Only called by the objects manager for the pickups near the player. If the item 
+        was picked up, set the `deleted` property to True.
         """
         if math.hypot(self.game.player.x - self.x, self.game.player.y - self.y) <= PICKUP_DISTANCE:
             if self.pick_up():
@@ -314,7 +314,7 @@ class Player:
         self.angle += self.mouse_rel * MOUSE_SPEED
 
     def use_lever(self) -> None:
-        if self.game.level.png_map.can_use_lever(self):
+        if self.game.level.can_use_lever(self):
             if self.game.kills_percentage >= 70:
                 self.game.stop_timer()
                 self.game.open_menu(LevelCompleteMenu(self.game))
@@ -1,7 +1,6 @@
 from PIL import Image
-from typing import Tuple
-
-from player import Player
+from typing import List, Tuple
+import numpy as np
 
 RGB_TO_TEX = {
     (0, 0, 0): "STARTAN3",
@@ -48,35 +47,84 @@ RGB_TO_TEX = {
 }
 
 
+# the color of empty cells
+EMPTY_RGB = (255, 255, 255)
+# the texture of the lever that ends the level
+LEVER = "SW1STARG"
+
+# every texture name once, in the order of `RGB_TO_TEX`, after "EMPTY" for empty cells
+TEX_NAMES: List[str] = ["EMPTY"] + list(dict.fromkeys(RGB_TO_TEX.values()))
+
+
+def color_key(rgb: Tuple[int, int, int]) -> int:
+    """Pack a color into a 24-bit integer."""
+
+    r, g, b = rgb
+    return (r << 16) | (g << 8) | b
+
+
+# the texture id of every color, by color key
+COLOR_TO_ID = {color_key(rgb): TEX_NAMES.index(name) for rgb, name in RGB_TO_TEX.items()}
+COLOR_TO_ID[color_key(EMPTY_RGB)] = 0
+# the same as sorted arrays, for looking up every pixel at once with `np.searchsorted`
+COLOR_KEYS: np.ndarray = np.array(sorted(COLOR_TO_ID), dtype=np.uint32)
+COLOR_TEX_IDS: np.ndarray = np.array([COLOR_TO_ID[key] for key in sorted(COLOR_TO_ID)], dtype=np.int32)
+
+
 class PNGMap:
     def __init__(self, path: str) -> None:
         self.path: str = path
         self.image: Image = Image.open(self.path)
         self.pixels = self.image.load()
 
-    def to_map(self) -> None:
-        map = []
+        # the cell of the lever, set when the map is decoded
+        self.next_level: Tuple[int, int] = None
 
-        for y in range(self.image.height):
-            row = []
-            for x in range(self.image.width):
-                r, g, b, a = self.get(x, y)
-                rgb = r, g, b
-                if rgb == (255, 255, 255):
-                    row.append(" ")
-                else:
-                    row.append(RGB_TO_TEX[rgb])
+    def to_texture_ids(self) -> Tuple[np.ndarray, List[str]]:
+        """Decode the image into a grid of texture ids, one cell per pixel.
 
-                    if RGB_TO_TEX[rgb] == "SW1STARG":  # lever
-                        self.next_level = x, y
-            map.append(row)
+        Every pixel's color is packed into an integer and looked up in the sorted keys of 
+        `RGB_TO_TEX` in one go. Also finds the lever.
 
-        return map
+        Returns:
+            tuple[np.ndarray, list[str]]: The (height, width) grid of texture ids, and the 
+                names of the textures the map uses, indexed by id. Id 0 is "EMPTY", for 
+                empty cells.
+
+        Raises:
+            ValueError: when the image has colors that aren't in `RGB_TO_TEX`.
+        """
+        rgb = np.asarray(self.image.convert("RGB"), dtype=np.uint32)
+        keys = (rgb[:, :, 0] << 16) | (rgb[:, :, 1] << 8) | rgb[:, :, 2]
+
+        found = np.minimum(np.searchsorted(COLOR_KEYS, keys), len(COLOR_KEYS) - 1)
+        unknown = COLOR_KEYS[found] != keys
+        if unknown.any():
+            cells = np.argwhere(unknown)
+            listed = ", ".join(f"{tuple(rgb[y, x].tolist())} at ({x}, {y})" for y, x in cells[:10].tolist())
+            more = f" and {len(cells) - 10} more" if len(cells) > 10 else ""
+            raise ValueError(f"Unknown colors in the map {self.path}: {listed}{more}")
+        tex_ids = COLOR_TEX_IDS[found]
+
+        # only keep the textures the map uses, so only those get loaded for it
+        used = np.bincount(tex_ids.ravel(), minlength=len(TEX_NAMES)) > 0
+        used[0] = True
+        tex_ids = (np.cumsum(used, dtype=np.int32) - 1)[tex_ids]
+        tex_names = [TEX_NAMES[i] for i in np.flatnonzero(used).tolist()]
+
+        # the last lever in reading order, if there are several
+        if LEVER in tex_names:
+            levers = np.flatnonzero(tex_ids == tex_names.index(LEVER))
+            y, x = divmod(int(levers[-1]), tex_ids.shape[1])
+            self.next_level = x, y
+
+        return tex_ids, tex_names
+
+    def to_map(self) -> List[List[str]]:
+        """Decode the image into rows of texture names, with space for empty cells."""
+
+        tex_ids, tex_names = self.to_texture_ids()
+        return np.array([" "] + tex_names[1:])[tex_ids].tolist()
     
     def get(self, x: int, y: int) -> Tuple[int, int, int]:
         return self.pixels[x, y]
-
-    def can_use_lever(self, player: Player):
-        pgx, pgy = player.grid_position
-        nlx, nly = self.next_level
-        return abs(pgx - nlx) <= 1 and abs(pgy - nly) <= 1
@@ -0,0 +1,222 @@
+"""Potentially visible sets: which cells of a map can be seen from each open cell.
+
+The map doesn't change after it is loaded, so this is computed once per map and saved
+next to it, in a `.pvs` file. The file starts with the hash of the map's occupancy grid,
+so it is rebuilt automatically when the map changes.
+
+Usage:
+    pvs = PVS.load_or_build(level_map, "DOOM/resources/map_data/1.pvs")
+    if pvs.is_visible(player.grid_position, enemy.grid_position):
+        ...
+"""
+
+from __future__ import annotations
+from typing import TYPE_CHECKING, Tuple
+if TYPE_CHECKING:
+    from map import Map
+
+import hashlib
+import math
+import os
+import struct
+import zlib
+
+import numpy as np
+
+from config import MAX_DEPTH
+
+MAGIC = b"PVS2"
+HEADER = struct.Struct("<4s20sHH")
+
+# rays cast from every sample point
+PVS_RAYS: int = 360
+# where rays are cast from inside every cell: its middle and near its corners
+SAMPLE_POINTS: np.ndarray = np.array([[0.5, 0.5], [0.1, 0.1], [0.9, 0.1], [0.1, 0.9], [0.9, 0.9]])
+
+
+def in_cells(cells: np.ndarray, x: float, y: float) -> bool:
+    """Look up the position x,y in a grid returned by `PVS.visible_from`. Positions out of 
+    the map count as visible."""
+
+    height, width = cells.shape
+    if 0 <= x < width and 0 <= y < height:
+        return bool(cells[int(y), int(x)])
+    return True
+
+
+class PVS:
+    """The cells visible from every cell of a map, as a bit matrix.
+
+    Row `y * width + x` has a bit set for every cell visible from the cell at x,y. Cells
+    out of the map are treated as visible from everywhere.
+
+    Attributes:
+        `width` (`int`): The width of the map.
+        `height` (`int`): The height of the map.
+        `bits` (`np.ndarray`): The bit-packed (cells, cells) visibility matrix.
+    """
+
+    def __init__(self, width: int, height: int, bits: np.ndarray) -> None:
+        self.width: int = width
+        self.height: int = height
+        self.bits: np.ndarray = bits
+
+        # the last unpacked row, most lookups are from the player's cell
+        self.row_cell: Tuple[int, int] = None
+        self.row_cells: np.ndarray = None
+
+    @staticmethod
+    def key(level_map: Map) -> bytes:
+        """Hash the occupancy grid of `level_map`."""
+
+        return hashlib.sha1(struct.pack("<HH", level_map.width, level_map.height) + level_map.solid.tobytes()).digest()
+
+    @staticmethod
+    def is_current(level_map: Map, path: str) -> bool:
+        """Check whether the file at `path` holds the PVS of `level_map`."""
+
+        if not os.path.isfile(path):
+            return False
+        with open(path, "rb") as f:
+            magic, file_key, _, _ = HEADER.unpack(f.read(HEADER.size))
+        return magic == MAGIC and file_key == PVS.key(level_map)
+
+    @staticmethod
+    def load_or_build(level_map: Map, path: str) -> PVS:
+        """Load the PVS of `level_map` from `path`, or build and save it there if the file
+        is missing or was built for another map. When it can't be saved, the error is
+        printed and the PVS is used anyway."""
+
+        key = PVS.key(level_map)
+        if os.path.isfile(path):
+            with open(path, "rb") as f:
+                magic, file_key, width, height = HEADER.unpack(f.read(HEADER.size))
+                if magic == MAGIC and file_key == key:
+                    cells = width * height
+                    bits = np.frombuffer(zlib.decompress(f.read()), dtype=np.uint8).reshape(cells, -1)
+                    return PVS(width, height, bits)
+
+        pvs = PVS.build(level_map)
+        # written next to it and swapped in, so an interrupted write doesn't leave a
+        # truncated file
+        try:
+            with open(path + ".tmp", "wb") as f:
+                f.write(HEADER.pack(MAGIC, key, pvs.width, pvs.height))
+                f.write(zlib.compress(pvs.bits.tobytes(), 9))
+            os.replace(path + ".tmp", path)
+        except OSError as e:
+            # e.g. a read-only install, the PVS is built again the next time
+            print(f"Couldn't save the potentially visible sets to {path}: {e}")
+            if os.path.isfile(path + ".tmp"):
+                os.remove(path + ".tmp")
+        return pvs
+
+    @staticmethod
+    def build(level_map: Map) -> PVS:
+        """Compute the PVS of `level_map`.
+
+        From sample points in every open cell, a fan of `PVS_RAYS` rays is stepped through
+        the grid lines like the raycaster does, and every cell a ray passes through before
+        it hits a wall (and the wall itself) is visible. To make up for cells that could
+        slip between the rays, the result is grown by one cell in every direction, and made
+        symmetric.
+
+        The line of sight rays of `Visibility` only look for walls in their first `MAX_DEPTH`
+        crossings, so they see through the walls further away. Cells more than `MAX_DEPTH`
+        apart are visible from each other, and closer ones are within reach of the rays.
+
+        The result takes (cells)² bits, so this is meant for maps of up to a few thousand 
+        cells like the game's, `Map.load_pvs` doesn't build it above `PVS_MAX_CELLS`.
+        """
+        height, width = level_map.solid.shape
+        cells = width * height
+        solid_padded = np.pad(level_map.solid, 1)
+
+        angles = (np.arange(PVS_RAYS) + 0.5) * (math.tau / PVS_RAYS)
+        sin_a = np.tile(np.sin(angles), len(SAMPLE_POINTS))
+        cos_a = np.tile(np.cos(angles), len(SAMPLE_POINTS))
+        # enough steps to reach every cell up to `MAX_DEPTH` away
+        steps = np.arange(MAX_DEPTH + 1)
+
+        visible = np.zeros((cells, height, width), dtype=bool)
+        for y, x in np.argwhere(~level_map.solid):
+            ox = x + np.repeat(SAMPLE_POINTS[:, 0], PVS_RAYS)
+            oy = y + np.repeat(SAMPLE_POINTS[:, 1], PVS_RAYS)
+
+            # horizontals
+            y_hor = np.where(sin_a > 0, y + 1, y - 1e-6)
+            dy = np.where(sin_a > 0, 1, -1)
+            depth_hor = (y_hor - oy) / sin_a
+            delta_depth = dy / sin_a
+            hor = PVS.crossings(ox + depth_hor * cos_a, y_hor, delta_depth * cos_a, dy, depth_hor, delta_depth, steps,
+                                width, height)
+
+            # verticals
+            x_vert = np.where(cos_a > 0, x + 1, x - 1e-6)
+            dx = np.where(cos_a > 0, 1, -1)
+            depth_vert = (x_vert - ox) / cos_a
+            delta_depth = dx / cos_a
+            vert = PVS.crossings(x_vert, oy + depth_vert * sin_a, dx, delta_depth * sin_a, depth_vert, delta_depth, steps,
+                                 width, height)
+
+            # the nearest wall of every ray, walls further than the line of sight looks are ignored
+            hits = [np.where(solid_padded[rows + 1, cols + 1] & (steps < MAX_DEPTH), depths, np.inf).min(axis=1)
+                    for cols, rows, depths in (hor, vert)]
+            wall_depth = np.minimum(*hits)[:, None]
+
+            seen = visible[y * width + x]
+            seen[y, x] = True
+            for cols, rows, depths in (hor, vert):
+                reached = (depths <= wall_depth) & (cols >= 0) & (cols < width) & (rows >= 0) & (rows < height)
+                seen[rows[reached], cols[reached]] = True
+
+        # grow every set by one cell
+        padded = np.pad(visible, ((0, 0), (1, 1), (1, 1)))
+        grown = np.zeros_like(visible)
+        for dy in range(3):
+            for dx in range(3):
+                grown |= padded[:, dy:dy + height, dx:dx + width]
+        grown[level_map.solid.ravel()] = False  # nothing is seen from inside walls
+
+        grown = grown.reshape(cells, cells)
+        grown |= grown.T
+
+        ys, xs = np.divmod(np.arange(cells), width)
+        grown |= np.hypot(xs[:, None] - xs, ys[:, None] - ys) > MAX_DEPTH
+        return PVS(width, height, np.packbits(grown, axis=1))
+
+    @staticmethod
+    def crossings(x: np.ndarray, y: np.ndarray, dx: np.ndarray, dy: np.ndarray, depth: np.ndarray,
+                  delta_depth: np.ndarray, steps: np.ndarray, width: int, height: int)\
+                    -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """Step every ray `len(steps)` times from (x, y).
+
+        Returns:
+            tuple[np.ndarray, np.ndarray, np.ndarray]: The column, row and depth of every
+                step of every ray. Out of bounds cells are clipped to the border around
+                the map.
+        """
+        # truncate like int() does
+        cols = np.clip(x[:, None] + dx[:, None] * steps, -1, width).astype(np.intp)
+        rows = np.clip(y[:, None] + dy[:, None] * steps, -1, height).astype(np.intp)
+        return cols, rows, depth[:, None] + delta_depth[:, None] * steps
+
+    def visible_from(self, cell: Tuple[int, int]) -> np.ndarray:
+        """Get a (height, width) boolean grid of the cells visible from `cell`, or None if
+        `cell` is out of the map."""
+
+        if cell != self.row_cell:
+            x, y = cell
+            self.row_cell = cell
+            if 0 <= x < self.width and 0 <= y < self.height:
+                row = np.unpackbits(self.bits[y * self.width + x], count=self.width * self.height)
+                self.row_cells = row.reshape(self.height, self.width).astype(bool)
+            else:
+                self.row_cells = None
+        return self.row_cells
+
+    def is_visible(self, source: Tuple[int, int], target: Tuple[int, int]) -> bool:
+        """Check whether anything in the cell `target` can be seen from the cell `source`."""
+
+        cells = self.visible_from(source)
+        return cells is None or in_cells(cells, *target)
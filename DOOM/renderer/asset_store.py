@@ -0,0 +1,178 @@
+"""A process-wide store of loaded images and textures.
+
+Every sprite, enemy and weapon used to load its own copy of its images. The 
+`AssetStore` loads each file once and hands out the same Surface to everyone who 
+asks for it, so loading time and memory depend on the number of different assets 
+instead of the number of entities.
+
+Assets are acquired inside a scope, normally one per loaded level. Releasing a scope 
+drops every asset that no other scope still uses.
+
+Images that are in the texture atlas (see `build_atlas.py`) are served as views of 
+its pages instead of being loaded from their own files. Images already decoded by the 
+level preloader are taken from `decoded` instead of being read again.
+
+Usage:
+    from renderer.asset_store import ASSETS
+    scope = ASSETS.open_scope()
+    image = ASSETS.image("DOOM/resources/textures/sprites/barrel.png")
+    ASSETS.release_scope(scope)
+"""
+
+import os
+from typing import Any, Callable
+
+import pygame as pg
+
+from config import *
+from renderer.texture import TextureData
+from renderer.atlas import Atlas
+
+
+class AssetStore:
+    """Loads images and textures once, shares them, and counts who uses them.
+
+    The shared Surfaces are read-only: anything that needs a modified image must make 
+    its own copy.
+
+    Attributes:
+        `assets` (`dict[tuple, Any]`): The loaded assets, by key.
+        `ref_counts` (`dict[tuple, int]`): How many times every asset is acquired.
+        `scopes` (`dict[int, list[tuple]]`): The keys acquired in every open scope.
+        `scope` (`int`): The scope new acquisitions are recorded in, or None to keep them forever.
+        `loads` (`int`): The number of times an asset was actually loaded from disk.
+        `atlas` (`Atlas`): The texture atlas, or None if it wasn't built.
+        `decoded` (`dict[str, pg.Surface]`): Images decoded ahead of time and not converted 
+            yet, by path. Each is used once, by the first load of its file.
+    """
+
+    def __init__(self) -> None:
+        self.assets: dict[tuple, Any] = {}
+        self.ref_counts: dict[tuple, int] = {}
+        self.listings: dict[str, list[str]] = {}
+
+        self.scopes: dict[int, list[tuple]] = {}
+        self.scope: int = None
+        self.next_scope: int = 0
+
+        self.loads: int = 0
+
+        self.atlas: Atlas = None
+        self.atlas_checked: bool = False
+
+        self.decoded: dict[str, pg.Surface] = {}
+
+    def get_atlas(self) -> Atlas:
+        """Get the texture atlas, loading its index the first time."""
+
+        if not self.atlas_checked:
+            self.atlas = Atlas.load()
+            self.atlas_checked = True
+        return self.atlas
+
+    def image(self, path: str, scale: float = 1) -> pg.Surface:
+        """Get the image at `path` with per-pixel alpha, optionally scaled by `scale`.
+
+        Args:
+            path (str): The path to the image file.
+            scale (float, optional): The scale of the image. Defaults to 1.
+
+        Returns:
+            pg.Surface: The shared image. Must not be modified.
+        """
+        def load() -> pg.Surface:
+            if scale != 1:
+                image = self.image(path)
+                return pg.transform.scale(image, (image.get_width() * scale, image.get_height() * scale))
+
+            atlas = self.get_atlas()
+            if atlas is not None and atlas.has(path):
+                return atlas.get(path)
+
+            image = self.read(path)
+            # images can be loaded before the window is created, like the text glyphs 
+            # `menu/menu.py` loads when it is imported
+            return image.convert_alpha() if pg.display.get_surface() is not None else image
+
+        return self.acquire(("image", path, scale), load)
+
+    def images_in(self, directory: str, scale: float = 1) -> list[pg.Surface]:
+        """Get every image in `directory`, in the order the files are listed.
+
+        Args:
+            directory (str): The directory with the images.
+            scale (float, optional): The scale of the images. Defaults to 1.
+
+        Returns:
+            list[pg.Surface]: The shared images. Must not be modified.
+        """
+        if directory not in self.listings:
+            self.listings[directory] = [file_name for file_name in os.listdir(directory)
+                                        if os.path.isfile(os.path.join(directory, file_name))]
+        return [self.image(directory + "/" + file_name, scale) for file_name in self.listings[directory]]
+
+    def texture(self, path: str, resolution: tuple[int, int] = (TEX_SIZE, TEX_SIZE)) -> TextureData:
+        """Get the texture at `path`, scaled to `resolution`.
+
+        Returns:
+            TextureData: The shared texture. Its Surface must not be modified.
+        """
+        def load() -> TextureData:
+            atlas = self.get_atlas()
+            if atlas is not None and atlas.has(path, resolution):
+                return TextureData(path, resolution, atlas.get(path))
+            return TextureData(path, resolution, pg.transform.scale(self.read(path).convert_alpha(), resolution))
+
+        return self.acquire(("texture", path, resolution), load)
+
+    def read(self, path: str) -> pg.Surface:
+        """Get the image at `path` as decoded from its file, not converted to any pixel format."""
+
+        image = self.decoded.pop(path, None)
+        return image if image is not None else pg.image.load(path)
+
+    def acquire(self, key: tuple, load: Callable[[], Any]) -> Any:
+        """Get the asset stored under `key`, calling `load` if it isn't loaded, and record 
+        the use in the current scope."""
+
+        asset = self.assets.get(key)
+        if asset is None:
+            asset = load()
+            self.assets[key] = asset
+            self.ref_counts[key] = 0
+            self.loads += 1
+
+        if self.scope is not None:
+            self.ref_counts[key] += 1
+            self.scopes[self.scope].append(key)
+        else:
+            # acquired outside of a scope, never unloaded
+            self.ref_counts[key] = float("inf")
+        return asset
+
+    def open_scope(self) -> int:
+        """Start recording acquired assets in a new scope, and make it the current one.
+
+        Returns:
+            int: The new scope, to be passed to `release_scope` when its assets aren't needed.
+        """
+        self.scope = self.next_scope
+        self.next_scope += 1
+        self.scopes[self.scope] = []
+        return self.scope
+
+    def release_scope(self, scope: int) -> None:
+        """Release every asset acquired in `scope`, unloading the ones nothing else uses."""
+
+        for key in self.scopes.pop(scope, []):
+            self.ref_counts[key] -= 1
+            if self.ref_counts[key] <= 0:
+                del self.ref_counts[key]
+                del self.assets[key]
+
+        if self.scope == scope:
+            self.scope = None
+
+
+# the store shared by the whole game
+ASSETS = AssetStore()
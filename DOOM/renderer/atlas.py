@@ -0,0 +1,117 @@
+"""Packed texture atlases.
+
+`build_atlas.py` packs the wall textures, sprites and HUD images into a few atlas pages
+stored as raw RGBA pixels, next to an index of where every image is. At runtime, every 
+page is memory-mapped and converted to the window's pixel format straight from the
+mapping, as one Surface, and images are handed out as views (subsurfaces) of it,
+instead of decoding and converting each PNG on its own. The converted page is a copy:
+the mapping is only kept for pages used before the window exists, which are served
+from it.
+
+The atlas is optional: without it, images are loaded from their PNG files. The index
+keeps a hash of every image's file, and images whose file changed since the atlas was
+built (or is gone) are also loaded from their files, until `build_atlas.py` runs again.
+"""
+
+import hashlib
+import json
+import os
+
+import pygame as pg
+import numpy as np
+
+RESOURCES_DIR = "DOOM/resources/"
+ATLAS_DIR = RESOURCES_DIR + "atlas/"
+INDEX_FILE = "index.json"
+
+
+def atlas_key(path: str) -> str:
+    """Get the key of an image in the atlas index from its path."""
+
+    path = os.path.normpath(path).replace(os.sep, "/")
+    prefix = os.path.normpath(RESOURCES_DIR).replace(os.sep, "/") + "/"
+    return path[len(prefix):] if path.startswith(prefix) else path
+
+
+def source_hash(path: str) -> str:
+    """Hash the file at `path`, or return None if it can't be read."""
+
+    try:
+        with open(path, "rb") as f:
+            return hashlib.sha1(f.read()).hexdigest()
+    except OSError:
+        return None
+
+
+class Atlas:
+    """The runtime side of the texture atlases.
+
+    Attributes:
+        `directory` (`str`): The directory with the index and the pages.
+        `pages` (`dict[str, dict]`): The file and size of every page, from the index.
+        `entries` (`dict[str, dict]`): The page, rect and file hash of every image that is
+            up to date, by atlas key.
+        `surfaces` (`dict[str, pg.Surface]`): The loaded pages.
+        `buffers` (`dict[str, np.memmap]`): The mapped pixels of the pages that are served 
+            from them, as they weren't converted.
+    """
+
+    def __init__(self, directory: str = ATLAS_DIR) -> None:
+        self.directory: str = directory
+
+        with open(directory + INDEX_FILE, "r") as f:
+            index = json.load(f)
+
+        self.pages: dict[str, dict] = index["pages"]
+        # edited images are served from their files, the atlas still has the old ones
+        self.entries: dict[str, dict] = {key: entry for key, entry in index["entries"].items()
+                                         if entry.get("hash") == source_hash(RESOURCES_DIR + key)}
+        stale = len(index["entries"]) - len(self.entries)
+        if stale:
+            print(f"{stale} images changed since the atlas was built, run build_atlas.py to pack them again")
+
+        self.surfaces: dict[str, pg.Surface] = {}
+        self.buffers: dict[str, np.memmap] = {}
+
+    @staticmethod
+    def load(directory: str = ATLAS_DIR) -> "Atlas":
+        """Load the atlas in `directory`, or return None if it wasn't built."""
+
+        if not os.path.isfile(directory + INDEX_FILE):
+            return None
+        return Atlas(directory)
+
+    def has(self, path: str, size: tuple[int, int] = None) -> bool:
+        """Check whether the image at `path` is in the atlas, optionally with the given size."""
+
+        entry = self.entries.get(atlas_key(path))
+        if entry is None:
+            return False
+        return size is None or tuple(entry["rect"][2:]) == tuple(size)
+
+    def get(self, path: str) -> pg.Surface:
+        """Get the image at `path` as a view of its atlas page.
+
+        Returns:
+            pg.Surface: A subsurface of the page. It is shared and must not be modified.
+        """
+        entry = self.entries[atlas_key(path)]
+        return self.page(entry["page"]).subsurface(entry["rect"])
+
+    def page(self, name: str) -> pg.Surface:
+        """Get an atlas page, mapping its pixels from disk the first time."""
+
+        surface = self.surfaces.get(name)
+        if surface is None:
+            page = self.pages[name]
+            width, height = page["size"]
+            pixels = np.memmap(self.directory + page["file"], dtype=np.uint8, mode="r", shape=(height, width, 4))
+            surface = pg.image.frombuffer(pixels, (width, height), "RGBA")
+            # match the window's pixel format when there is one, for faster blits; converting
+            # from the mapping saves reading the file into a buffer first
+            if pg.display.get_surface() is not None:
+                surface = surface.convert_alpha()
+            else:
+                self.buffers[name] = pixels
+            self.surfaces[name] = surface
+        return surface
@@ -0,0 +1,128 @@
+"""The per-frame state of every sprite, kept as a structure of arrays.
+
+Every `SpriteObject` is a handle to a slot of the store: its position, scale, shift and
+the values `get_sprite` computes (its angle, distance and position on the screen) are
+columns of arrays instead of instance attributes. The sprites' attributes still read and
+write like before through `EntityField` descriptors, and the projection is computed for
+all the sprites at once, in one vectorized pass per frame.
+
+Usage:
+    class SpriteObject:
+        x = EntityField()
+        ...
+
+    ENTITIES.project(player.x, player.y, player.angle)
+"""
+
+from typing import Dict
+
+import math
+
+import numpy as np
+
+from config import *
+
+
+class EntityStore:
+    """Columns of per-sprite values, indexed by the slot of the sprite.
+
+    Slots are handed out in order and not reused while a level is played, so a sprite
+    keeps its slot for as long as it exists. `clear` drops all of them when another
+    level is loaded.
+
+    Attributes:
+        `columns` (`dict[str, np.ndarray]`): The arrays, by the name of the sprite
+            attribute they hold. Only the first `count` values are used.
+        `count` (`int`): The number of slots handed out.
+        `projected` (`int`): The number of slots `project` last ran for. Sprites created
+            after it are projected on their own when they ask for it.
+        `on_screen` (`np.ndarray`): For every slot, whether the last projection put the
+            sprite on screen and in front of the player.
+    """
+
+    # the columns, the last ones are computed by `project`
+    FIELDS = ("x", "y", "sprite_scale", "sprite_height_shift", "image_half_width",
+              "dx", "dy", "theta", "screen_x", "dist", "norm_dist")
+
+    def __init__(self, capacity: int = 256) -> None:
+        self.columns: Dict[str, np.ndarray] = {name: np.zeros(capacity) for name in self.FIELDS}
+        self.on_screen: np.ndarray = np.zeros(capacity, dtype=bool)
+        self.count: int = 0
+        self.projected: int = 0
+
+    def allocate(self) -> int:
+        """Get a new slot, growing the arrays if they are full."""
+
+        if self.count == len(self.on_screen):
+            capacity = self.count * 2
+            for name, column in self.columns.items():
+                self.columns[name] = np.resize(column, capacity)
+            self.on_screen = np.resize(self.on_screen, capacity)
+
+        slot = self.count
+        for column in self.columns.values():
+            column[slot] = 0
+        self.on_screen[slot] = False
+        self.count += 1
+        return slot
+
+    def clear(self) -> None:
+        """Drop every slot. The sprites using them must not be used anymore."""
+
+        self.count = 0
+        self.projected = 0
+
+    def project(self, player_x: float, player_y: float, player_angle: float, start: int = 0) -> None:
+        """Compute the angle, distance and screen position of every sprite from `start` on,
+        for a player at (`player_x`, `player_y`) facing `player_angle`.
+
+        This is what `SpriteObject.get_sprite` did for a single sprite.
+        """
+        end = self.count
+        if start >= end:
+            return
+
+        c = self.columns
+        dx = c["x"][start:end] - player_x
+        dy = c["y"][start:end] - player_y
+        theta = np.arctan2(dy, dx)
+
+        delta = theta - player_angle
+        if player_angle > math.pi:
+            delta[dx > 0] += math.tau
+        delta[(dx < 0) & (dy < 0)] += math.tau
+
+        screen_x = (HALF_RAYS + delta / DELTA_ANGLE) * SCALE
+        dist = np.hypot(dx, dy)
+        norm_dist = dist * np.cos(delta)
+
+        c["dx"][start:end] = dx
+        c["dy"][start:end] = dy
+        c["theta"][start:end] = theta
+        c["screen_x"][start:end] = screen_x
+        c["dist"][start:end] = dist
+        c["norm_dist"][start:end] = norm_dist
+
+        half_width = c["image_half_width"][start:end]
+        self.on_screen[start:end] = (-half_width < screen_x) & (screen_x < WIN_WIDTH + half_width) & (norm_dist > 0.5)
+        self.projected = end
+
+
+class EntityField:
+    """A `SpriteObject` attribute kept in a column of `ENTITIES`, at the sprite's slot."""
+
+    def __set_name__(self, owner: type, name: str) -> None:
+        self.name: str = name
+
+    def __get__(self, entity, owner: type = None):
+        if entity is None:
+            return self
+        # as a python float, numpy scalars are slow in the scalar math done on them
+        return ENTITIES.columns[self.name].item(entity.slot)
+
+    def __set__(self, entity, value: float) -> None:
+        ENTITIES.columns[self.name][entity.slot] = value
+
+
+# the store of every sprite of the loaded level
+ENTITIES = EntityStore()
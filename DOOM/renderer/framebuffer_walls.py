@@ -0,0 +1,95 @@
+"""Draws the walls straight into the pixels of the window.
+
+Instead of making, darkening and blitting one Surface per wall column, the 
+`FramebufferWallRenderer` computes every textured wall pixel of the frame as one 
+array operation, sampling textures that were darkened ahead of time, and copies 
+them into the window's pixel buffer.
+"""
+
+import math
+import pygame as pg
+import numpy as np
+
+from config import *
+from renderer.texture import TextureData
+from renderer.shading import Shading
+
+
+class FramebufferWallRenderer:
+    """Writes textured, distance-darkened wall columns into the pixels of a Surface.
+
+    Attributes:
+        `surface` (`pg.Surface`): The 32-bit Surface to draw on.
+        `shading` (`Shading`): Picks the shading band of every ray.
+        `texels` (`np.ndarray`): The flattened darkened mip levels of every texture for every 
+            band, in the pixel format of `surface`.
+        `starts` (`np.ndarray`): Where the texels of every (band, texture) start in `texels`.
+        `rows` (`np.ndarray`): The y of every row of the window.
+        `columns` (`np.ndarray`): The texture x offset of every screen column inside its ray.
+    """
+
+    def __init__(self, surface: pg.Surface, textures: list[TextureData], shading: Shading) -> None:
+        """Initializes the renderer.
+
+        Args:
+            surface (pg.Surface): The 32-bit Surface to draw on.
+            textures (list[TextureData]): The wall textures, indexed by the texture ids the 
+                raycaster outputs.
+            shading (Shading): Maps depths to shading bands and darkens the textures.
+        """
+        self.surface: pg.Surface = surface
+        self.shading: Shading = shading
+
+        # texel (u, v) of a texture in a band is at its start + u * size + v
+        levels = []
+        self.starts: np.ndarray = np.zeros((shading.bands, len(textures)), dtype=np.int32)
+        start = 0
+        mips = [shading.texel_mips(texture.get_texels(surface)) for texture in textures]
+        for band in range(shading.bands):
+            for tex_id in range(len(textures)):
+                level = shading.shaded_texels(mips[tex_id], band).reshape(-1)
+                self.starts[band, tex_id] = start
+                start += len(level)
+                levels.append(level)
+        self.texels: np.ndarray = np.concatenate(levels)
+
+        self.rows: np.ndarray = np.arange(WIN_HEIGHT, dtype=np.float32)
+        self.columns: np.ndarray = np.arange(SCALE, dtype=np.int32)
+
+    def draw(self, depths: np.ndarray, proj_heights: np.ndarray, texture_ids: np.ndarray, offsets: np.ndarray) -> None:
+        """Draw the walls from the results of the raycaster.
+
+        Args:
+            depths (np.ndarray): The depth of the wall hit by each ray.
+            proj_heights (np.ndarray): The projected height of the wall hit by each ray.
+            texture_ids (np.ndarray): The texture of the wall hit by each ray.
+            offsets (np.ndarray): Where in the texture (0-1) each ray hit the wall.
+        """
+        # only the rows covered by the tallest wall need to be computed
+        half_height = min(proj_heights.max() / 2, WIN_HALF_HEIGHT)
+        y0 = max(math.floor(WIN_HALF_HEIGHT - half_height), 0)
+        y1 = min(math.ceil(WIN_HALF_HEIGHT + half_height), WIN_HEIGHT)
+
+        # every ray samples the darkened mip level of its band
+        bands = self.shading.bands_of(depths)
+        sizes = self.shading.mip_sizes[bands]
+
+        # the texture row of every (ray, window row), outside of [0, size) is not part of the wall
+        v = (self.rows[y0:y1] - WIN_HALF_HEIGHT) * (sizes / proj_heights).astype(np.float32)[:, None] \
+            + (sizes / 2).astype(np.float32)[:, None]
+        on_wall = (v >= 0) & (v < sizes[:, None])
+        v = v.astype(np.int32)
+        np.clip(v, 0, sizes[:, None] - 1, out=v)
+        v += self.starts[bands, texture_ids][:, None]
+
+        # the texture column of every screen column, columns of one ray are next to each other
+        u = (offsets * (TEX_SIZE - SCALE)).astype(np.int32)[:, None] + self.columns
+        u = (u * sizes[:, None] // TEX_SIZE) * sizes[:, None]
+
+        pixels = self.texels[v[:, None, :] + u[:, :, None]]
+
+        # copy into the window, leaving the sky and ground where there is no wall
+        window = pg.surfarray.pixels2d(self.surface)
+        width = RAYS * SCALE
+        np.copyto(window[:width, y0:y1], pixels.reshape(width, y1 - y0), where=np.repeat(on_wall, SCALE, axis=0))
+        del window
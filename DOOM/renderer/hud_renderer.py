@@ -2,7 +2,8 @@ import pygame as pg
 import os
 import random
 
-from config import WIN_WIDTH, WIN_HEIGHT, WIN_HALF_WIDTH
+from config import WIN_WIDTH, WIN_HEIGHT, WIN_HALF_WIDTH, SHOW_DEBUG_INFO
+from renderer.asset_store import ASSETS
 
 
 class HUDText:
@@ -40,7 +41,7 @@ class HUDText:
         return res
 
     def load(self, name: str, size_name: str) -> pg.Surface:
-        return pg.image.load(f"DOOM/resources/textures/hud/text/{size_name}/" + name + ".png")
+        return ASSETS.image(f"DOOM/resources/textures/hud/text/{size_name}/" + name + ".png")
 
 
 class HUDRenderer:
@@ -114,7 +115,20 @@ class HUDRenderer:
 
         self.draw_console_text()
         self.draw_weapon_numbers()
+
+        if SHOW_DEBUG_INFO:
+            self.draw_debug_info()
     
+    def draw_debug_info(self) -> None:
+        lines = [self.game.objects_manager.ai_scheduler.debug_text()]
+        if self.game.restart_time is not None:
+            lines.append(f"last restart: {self.game.restart_time:.1f} ms")
+        y = 10
+        for line in lines:
+            surf = self.hud_text.string_to_surface(line, "small", scale=2)
+            self.game.surface.blit(surf, (WIN_WIDTH - surf.get_width() - 10, y))
+            y += surf.get_height() + 4
+
     def draw_console_text(self) -> None:
         if self.console_text:
             console_surf = self.hud_text.string_to_surface(self.console_text, "small", scale=3, margin=0)
@@ -163,10 +177,7 @@ class HUDRenderer:
         self.face_death: list[pg.Surface] = self.load_faces("0")
     
     def load(self, path: str, scale: float = 1) -> pg.Surface:
-        img = pg.image.load("DOOM/resources/textures/hud/" + path + ".png")
-        if scale == 1:
-            return img
-        return pg.transform.scale(img, (img.get_width() * scale, img.get_height() * scale))
+        return ASSETS.image("DOOM/resources/textures/hud/" + path + ".png", scale)
     
     def load_faces(self, health: str) -> list[pg.Surface]:
         face_ratio = 3.3
@@ -10,13 +10,17 @@ import os
 
 from config import *
 from renderer.texture import TextureData
+from renderer.framebuffer_walls import FramebufferWallRenderer
+from renderer.shading import Shading
+from renderer.surface_cache import SurfaceCache
+from renderer.asset_store import ASSETS
 
 
 class ObjectRenderer:
     """Renders the ground, sky, walls, enemies, and decorations.
 
     This object first loads all the textures before the game starts. It also 
-    draws most objects in the game. Objects are read from the `objs_to_render` 
+    draws most objects in the game. Objects are read from the `render_queue` 
     property from the raycast object.
     """
 
@@ -30,13 +34,20 @@ class ObjectRenderer:
         # short name for quick access
         self.surface: pg.Surface = game.surface
         # load the wall textures
-        self.wall_textures: dict[int, TextureData] = self.load_wall_textures()
+        self.wall_textures: dict[str, TextureData] = self.load_wall_textures()
         # get all the wall texture keys
         ObjectRenderer.WALL_TEXTURES_KEYS = list(self.wall_textures.keys())
+        # darkens walls and sprites by their distance
+        self.shading: Shading = Shading()
+        # scaled sprite images shared by all sprites, keyed by (image, shading band, height)
+        self.sprite_cache: SurfaceCache = SurfaceCache(SPRITE_CACHE_BYTES)
 
         # let the sky texture be empty for now
         self.sky_texture: TextureData = None
         self.sky_offset: float = 0
+
+        # draws the walls straight into the window when enabled, set when the map is loaded
+        self.wall_renderer: FramebufferWallRenderer = None
     
     def draw(self) -> None:
         """Draw the sky, the ground, and lastly the objects."""
@@ -51,17 +62,13 @@ class ObjectRenderer:
     def render_objects(self) -> None:
         """Render objects."""
 
-        # draw the objects from the farthest to the closest, so the nearer objects will cover the farther ones.
-        objs = sorted(self.game.raycast.objs_to_render, reverse=True, key=lambda o: o[0])
+        # draw all the walls at once, the sprites then only cover the walls where they are in front
+        if self.wall_renderer is not None:
+            raycast = self.game.raycast
+            self.wall_renderer.draw(raycast.depths, raycast.proj_heights, raycast.texture_ids, raycast.offsets)
 
-        # loop through and unpack the objects into the depth (z), image, and on-screen position
-        for depth, image, pos in objs:
-            # calculate the darkness from the depth
-            color = [min(255 / (1 + depth ** 5 * 0.00001), 230)] * 3
-            # darken the image to be drawn
-            image.fill(color, special_flags=pg.BLEND_RGB_MULT)
-            # draw the image on the main window
-            self.surface.blit(image, pos)
+        # draw the queued wall columns, then the sprites that are in front of them
+        self.game.raycast.render_queue.draw()
 
     def render_sky(self) -> None:
         """Draw the sky."""
@@ -87,15 +94,36 @@ class ObjectRenderer:
         base = "DOOM/resources/textures/walls/"
         # loop through all the wall texture files
         for path in os.listdir(base):
-            # map the TextureData to the file name
-            walls[path.split(".")[0]] = TextureData(base + path)
+            # map the TextureData to the file name, loaded only once for the whole game
+            walls[path.split(".")[0]] = ASSETS.texture(base + path)
         # return the read wall textures
         return walls
 
+    def load_map_textures(self, tex_names: list[str]) -> None:
+        """Prepare for a map: drop the darkened copies of the previous map's images, and set up 
+        the framebuffer wall renderer if it is enabled.
+
+        Args:
+            tex_names (list[str]): The names of the wall textures used by the map, indexed by 
+                their texture ids.
+        """
+
+        # the darkened copies of the previous level's images
+        self.shading.clear()
+
+        # writing pixels directly needs 32-bit pixels
+        if WALL_RENDERER == "framebuffer" and self.surface.get_bytesize() == 4:
+            self.wall_renderer = FramebufferWallRenderer(self.surface, [self.wall_textures[name] for name in tex_names],
+                                                         self.shading)
+        else:
+            self.wall_renderer = None
+
     def load_sky_texture(self, file_name: str) -> None:
         """Load the sky texture"""
 
         # read and store the sky texture
-        self.sky_texture = TextureData(f"DOOM/resources/textures/skies/{file_name}.png", (WIN_WIDTH, WIN_HALF_HEIGHT))
+        path = f"DOOM/resources/textures/skies/{file_name}.png"
+        self.sky_texture = TextureData(path, (WIN_WIDTH, WIN_HALF_HEIGHT),
+                                       pg.transform.scale(ASSETS.read(path).convert_alpha(), (WIN_WIDTH, WIN_HALF_HEIGHT)))
         # darken the sky a little
         self.sky_texture.texture.fill((210, 210, 210), special_flags=pg.BLEND_RGB_MULT)
@@ -1,6 +1,32 @@
 from enemy import Enemy
 from renderer.sprite_object import SpriteObject, AnimatedSpriteObject
 from pickup import Pickup
+from ai_scheduler import AIScheduler
+from spatial_hash import SpatialHash
+from visibility import Visibility
+from pvs import in_cells
+from renderer.sprite_culler import SpriteCuller
+from renderer.entity_store import ENTITIES
+from config import *
+
+
+def swap_append(items: list, item: SpriteObject) -> None:
+    """Append `item` to `items`, and remember its index in it for `swap_remove`."""
+
+    item.list_index = len(items)
+    items.append(item)
+
+
+def swap_remove(items: list, item: SpriteObject) -> None:
+    """Remove `item` from `items` by moving the last item into its place, so nothing after 
+    it has to shift. Doesn't keep the order of `items`, which must only be filled with
+    `swap_append`."""
+
+    i = item.list_index
+    last = items.pop()
+    if last is not item:
+        items[i] = last
+        last.list_index = i
 
 
 class ObjectInfo:
@@ -33,25 +59,103 @@ class ObjectsManager:
         self.objects: list[SpriteObject] = objects
         self.enemies: list[Enemy] = enemies
         self.pickups: list[Pickup] = pickups
+        for items in (enemies, pickups):
+            for i, item in enumerate(items):
+                item.list_index = i
+
+        # decides which enemies think in every frame
+        self.ai_scheduler: AIScheduler = AIScheduler()
+        # line of sight between the player and the enemies
+        self.visibility: Visibility = Visibility(game)
+
+        # where everything is, so only what is near the player is visited
+        self.enemy_index: SpatialHash = SpatialHash(SPATIAL_HASH_CELL_SIZE)
+        self.pickup_index: SpatialHash = SpatialHash(SPATIAL_HASH_CELL_SIZE)
+        # the positions of the sprites that don't move, so only what is in front of the player 
+        # is projected
+        self.object_culler: SpriteCuller = SpriteCuller()
+        self.pickup_culler: SpriteCuller = SpriteCuller()
+
+        # the enemies close enough to the player to be heard this frame
+        self.audible_enemies: set[Enemy] = set()
+        # enemies that finished dying this frame, moved to the static objects after the AI ran
+        self.corpses: list[Enemy] = []
+
+    def clear(self) -> None:
+        self.objects = []
+        self.enemies = []
+        self.pickups = []
+
+        self.enemy_index.clear()
+        self.pickup_index.clear()
+        self.object_culler.clear()
+        self.pickup_culler.clear()
+        self.audible_enemies = set()
+        self.corpses = []
+        self.visibility.cache.clear()
 
     def add_sprite(self, sprite: SpriteObject) -> None:
         self.objects.append(sprite)
+        self.object_culler.add(sprite)
     
     def add_enemy(self, enemy: Enemy) -> None:
-        self.enemies.append(enemy)
+        swap_append(self.enemies, enemy)
+        self.enemy_index.insert(enemy)
     
     def add_pickup(self, pickup: Pickup) -> None:
-        self.pickups.append(pickup)
+        swap_append(self.pickups, pickup)
+        self.pickup_index.insert(pickup)
+        self.pickup_culler.add(pickup)
+
+    def enemy_moved(self, enemy: Enemy) -> None:
+        self.enemy_index.move(enemy)
+
+    def remove_pickup(self, pickup: Pickup) -> None:
+        swap_remove(self.pickups, pickup)
+        self.pickup_index.remove(pickup)
+        self.pickup_culler.remove(pickup)
+
+    def bury(self, enemy: Enemy) -> None:
+        """Turn a dead enemy into a static object once the AI is done for this frame, so it 
+        stops thinking and is culled like any other decoration."""
+
+        self.corpses.append(enemy)
+
+    def compact(self) -> None:
+        for enemy in self.corpses:
+            swap_remove(self.enemies, enemy)
+            self.enemy_index.remove(enemy)
+            self.visibility.forget(enemy)
+            # static objects are culled by the object culler, with the PVS of every frame
+            enemy.potentially_visible = True
+            self.add_sprite(enemy)
+        self.corpses.clear()
     
     def update(self) -> None:
-        for obj in self.objects:
+        player = self.game.player
+
+        # the angle and distance to the player of every sprite, for their `get_sprite`
+        ENTITIES.project(player.x, player.y, player.angle)
+
+        visible_cells = self.game.level.map.visible_cells(player.grid_position)
+
+        # sprites outside of the view cone, or in cells that can't be seen, can't be on screen
+        for obj in self.object_culler.visible(player.x, player.y, player.angle, visible_cells):
             obj.update()
 
+        # enemies always update, their AI uses the angle and distance to the player
+        self.audible_enemies = set(self.enemy_index.query_radius(player.x, player.y, SOUND_MAX_DISTANCE))
         for enemy in self.enemies:
+            enemy.potentially_visible = visible_cells is None or in_cells(visible_cells, enemy.x, enemy.y)
             enemy.update()
+        self.visibility.update(self.enemies)
+        self.ai_scheduler.update(self.enemies)
+        self.compact()
         
-        for pickup in self.pickups:
-            if pickup.deleted:
-                continue
-
+        for pickup in self.pickup_culler.visible(player.x, player.y, player.angle, visible_cells):
             pickup.update()
+
+        for pickup in self.pickup_index.query_radius(player.x, player.y, PICKUP_DISTANCE):
+            pickup.check_pick_up()
+            if pickup.deleted:
+                self.remove_pickup(pickup)
@@ -0,0 +1,88 @@
+"""Precomputed angles and trigonometry shared by the raycasters.
+
+The offsets of the rays across the FOV never change, so they and their fisheye 
+correction cosines are computed once here. Sines and cosines of arbitrary angles 
+are read from a quantized table instead of being computed for every ray.
+"""
+
+import math
+import numpy as np
+
+from config import *
+
+
+class RayTable:
+    """Per-ray angle offsets, fisheye correction and a quantized sin/cos table.
+
+    Attributes:
+        `resolution` (`int`): The number of table entries for one full turn.
+        `exact` (`bool`): Bypass the table and use exact math, for verification.
+        `step` (`float`): The angle covered by one table entry.
+        `relative_angles` (`np.ndarray`): The angle of every ray relative to the player's angle.
+        `correction` (`np.ndarray`): The fisheye correction cosine of every ray.
+        `sin_table` (`np.ndarray`): Sines of the middle of every table entry.
+        `cos_table` (`np.ndarray`): Cosines of the middle of every table entry.
+    """
+
+    def __init__(self, resolution: int = TRIG_TABLE_RESOLUTION, exact: bool = EXACT_TRIG) -> None:
+        self.resolution: int = resolution
+        self.exact: bool = exact
+        self.step: float = math.tau / resolution
+
+        self.relative_angles: np.ndarray = -HALF_FOV + 0.0001 + np.arange(RAYS) * DELTA_ANGLE
+        # cos(player.angle - ray_angle) only depends on the offset of the ray
+        self.correction: np.ndarray = np.cos(self.relative_angles)
+
+        # sample the middle of each entry, so a looked up sin/cos is never exactly 0
+        angles = (np.arange(resolution) + 0.5) * self.step
+        self.sin_table: np.ndarray = np.sin(angles)
+        self.cos_table: np.ndarray = np.cos(angles)
+
+        # plain lists are faster than numpy arrays for scalar lookups
+        self.correction_list: list[float] = self.correction.tolist()
+        self.sin_list: list[float] = self.sin_table.tolist()
+        self.cos_list: list[float] = self.cos_table.tolist()
+
+    def index(self, angle: float) -> int:
+        """Get the table index of `angle`."""
+
+        return math.floor(angle / self.step) % self.resolution
+
+    def sin(self, angle: float) -> float:
+        if self.exact:
+            return math.sin(angle)
+        return self.sin_list[self.index(angle)]
+
+    def cos(self, angle: float) -> float:
+        if self.exact:
+            return math.cos(angle)
+        return self.cos_list[self.index(angle)]
+
+    def ray_angles(self, player_angle: float) -> np.ndarray:
+        """Get the absolute angle of every ray when the player faces `player_angle`."""
+
+        return player_angle + self.relative_angles
+
+    def ray_trig(self, player_angle: float) -> tuple[np.ndarray, np.ndarray]:
+        """Get the sine and cosine of every ray when the player faces `player_angle`.
+
+        Returns:
+            tuple[np.ndarray, np.ndarray]: The sines and the cosines of the rays.
+        """
+        return self.trig(self.ray_angles(player_angle))
+
+    def trig(self, angles: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+        """Get the sines and cosines of an array of angles.
+
+        Returns:
+            tuple[np.ndarray, np.ndarray]: The sines and the cosines of the angles.
+        """
+        if self.exact:
+            return np.sin(angles), np.cos(angles)
+
+        indices = np.floor(angles / self.step).astype(np.intp) % self.resolution
+        return self.sin_table[indices], self.cos_table[indices]
+
+
+# the table shared by everything that casts rays
+RAY_TABLE = RayTable()
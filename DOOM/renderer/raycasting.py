@@ -1,10 +1,14 @@
 import pygame as pg
-import math
+import numpy as np
+import time
 
 from config import *
 from player import Player
 from map import Map
 from renderer.texture import TextureData
+from renderer.ray_table import RAY_TABLE
+from renderer.surface_cache import SurfaceCache
+from renderer.render_queue import RenderQueue
 
 
 class Raycasting:
@@ -14,41 +18,119 @@ class Raycasting:
         self.map: Map = self.game.level.map
         self.surf = self.game.surface
 
-        self.textures: dict[int, TextureData] = self.game.object_renderer.wall_textures
-
         self.raycast_result: list[tuple] = []
-        self.objs_to_render: list[tuple[float, pg.Surface, int]] = []
+        # the same results as arrays, textures are ids into `Map.tex_names` in both
+        self.depths: np.ndarray = np.zeros(RAYS)
+        self.proj_heights: np.ndarray = np.zeros(RAYS)
+        self.texture_ids: np.ndarray = np.zeros(RAYS, dtype=np.int32)
+        self.offsets: np.ndarray = np.zeros(RAYS)
+        # the walls and sprites to draw this frame
+        self.render_queue: RenderQueue = RenderQueue(self.surf)
+
+        # pre-scaled wall columns, keyed by (texture, texture x, height, clipped)
+        self.column_cache: SurfaceCache = SurfaceCache(WALL_COLUMN_CACHE_BYTES)
+
+        # time spent casting the rays in the last frame, in milliseconds
+        self.frame_time: float = 0
+
+        self.steps: np.ndarray = np.arange(MAX_DEPTH)
+        self.load_map_arrays()
+
+    def load_map_arrays(self) -> None:
+        """Copy the map's grids into the padded form the batched raycaster uses."""
+
+        # the occupancy and texture grids padded with one empty cell on every side, so 
+        # out-of-bounds tiles can be looked up without a bounds check
+        self.solid_padded: np.ndarray = np.pad(self.map.solid, 1)
+        self.tex_ids_padded: np.ndarray = np.pad(self.map.tex_ids, 1)
+        # the wall textures by texture id
+        wall_textures = self.game.object_renderer.wall_textures
+        self.textures: list[TextureData] = [wall_textures[name] for name in self.map.tex_names]
+        self.map_version: int = self.map.version
     
     def get_objects_to_render(self):
-        self.objs_to_render = []
+        self.render_queue.clear(self.depths)
+        if self.game.object_renderer.wall_renderer is not None:
+            # the walls are written straight into the window by the object renderer
+            return
+
         for ray, values in enumerate(self.raycast_result):
             depth, proj_h, tex, offset = values
+            # the texture column the subsurface would start at
+            tex_x = int(offset * (TEX_SIZE - SCALE))
 
             if proj_h < WIN_HEIGHT:
-                wall_col = self.textures[tex].texture.subsurface(offset * (TEX_SIZE - SCALE), 0, SCALE, TEX_SIZE)
-                wall_col = pg.transform.scale(wall_col, (SCALE, proj_h))
+                wall_col = self.get_wall_column(tex, tex_x, int(proj_h), False)
                 wall_pos = ray * SCALE, WIN_HALF_HEIGHT - proj_h // 2
             else:
                 tex_h = TEX_SIZE * WIN_HEIGHT / proj_h
-                wall_col = self.textures[tex].texture.subsurface(offset * (TEX_SIZE - SCALE), HALF_TEX_SIZE - tex_h // 2,
-                                                                    SCALE, tex_h)
-                wall_col = pg.transform.scale(wall_col, (SCALE, WIN_HEIGHT))
+                wall_col = self.get_wall_column(tex, tex_x, int(tex_h), True)
                 wall_pos = (ray * SCALE, 0)
 
-            self.objs_to_render.append((depth, wall_col, wall_pos))
+            self.render_queue.add_wall(wall_col, wall_pos)
+
+    def get_wall_column(self, tex: int, tex_x: int, height: int, clipped: bool) -> pg.Surface:
+        """Get a scaled and darkened wall column from the column cache.
+
+        Args:
+            tex (int): The id of the wall texture.
+            tex_x (int): The x of the column in the texture.
+            height (int): The projected height of the column, or if `clipped`, the height 
+                of the part of the texture that fits on the screen.
+            clipped (bool): Whether the column is taller than the window.
+
+        Returns:
+            pg.Surface: The wall column, shared with every other ray that uses it.
+        """
+        def make() -> pg.Surface:
+            if clipped:
+                # the texture only gets clipped when the wall is right in front of the player
+                depth = SCREEN_DISTANCE / WIN_HEIGHT
+                top, tex_h, scaled_h = HALF_TEX_SIZE - height // 2, height, WIN_HEIGHT
+            else:
+                depth = SCREEN_DISTANCE / (height + 0.5)
+                top, tex_h, scaled_h = 0, TEX_SIZE, height
+
+            # the darkened texture is smaller for far away bands
+            shading = self.game.object_renderer.shading
+            texture = shading.shaded_texture(self.textures[tex], shading.band(depth))
+            ratio = texture.get_width() / TEX_SIZE
+
+            wall_col = texture.subsurface(int(tex_x * ratio), int(top * ratio),
+                                          max(int(SCALE * ratio), 1), max(int(tex_h * ratio), 1))
+            return pg.transform.scale(wall_col, (SCALE, scaled_h))
+
+        return self.column_cache.get((tex, tex_x, height, clipped), make)
+
+    def raycast(self) -> None:
+        """Cast the rays with the backend selected by `RAYCAST_BACKEND` and time it."""
 
-    def raycast(self):
+        start = time.perf_counter()
+        if self.map_version != self.map.version:
+            self.load_map_arrays()
+
+        if RAYCAST_BACKEND == "numpy":
+            self.raycast_numpy()
+        else:
+            self.raycast_python()
+        self.frame_time = (time.perf_counter() - start) * 1000
+
+    def raycast_python(self) -> None:
         self.raycast_result = []
 
         ox, oy = self.player.position
         x_grid, y_grid = self.player.grid_position
 
-        tex_vert, tex_hor = "EMPTY", "EMPTY"
+        # the flat texture id grid, with a border of empty cells around the map
+        tex_grid, grid_width = self.map.tex_grid, self.map.grid_width
+        width, height = self.map.width, self.map.height
+
+        tex_vert, tex_hor = 0, 0
 
         ray_angle = self.player.angle - HALF_FOV + 0.0001
         for ray in range(RAYS):
-            sin_a = math.sin(ray_angle)
-            cos_a = math.cos(ray_angle)
+            sin_a = RAY_TABLE.sin(ray_angle)
+            cos_a = RAY_TABLE.cos(ray_angle)
 
             y_hor, dy = (y_grid + 1, 1) if sin_a > 0 else (y_grid - 1e-6, -1)
             depth_hor = (y_hor - oy) / sin_a
@@ -58,9 +140,9 @@ class Raycasting:
             dx = delta_depth * cos_a
 
             for i in range(MAX_DEPTH):
-                tile_hor = int(x_hor), int(y_hor)
-                if not self.map.unoccupied(*tile_hor):
-                    tex_hor = self.map.map[tile_hor[1]][tile_hor[0]]
+                col, row = int(x_hor), int(y_hor)
+                if 0 <= col < width and 0 <= row < height and tex_grid[(row + 1) * grid_width + col + 1]:
+                    tex_hor = tex_grid[(row + 1) * grid_width + col + 1]
                     break
 
                 x_hor += dx
@@ -75,9 +157,9 @@ class Raycasting:
             dy = delta_depth * sin_a
 
             for i in range(MAX_DEPTH):
-                tile_vert = int(x_vert), int(y_vert)
-                if not self.map.unoccupied(*tile_vert):
-                    tex_vert = self.map.map[tile_vert[1]][tile_vert[0]]
+                col, row = int(x_vert), int(y_vert)
+                if 0 <= col < width and 0 <= row < height and tex_grid[(row + 1) * grid_width + col + 1]:
+                    tex_vert = tex_grid[(row + 1) * grid_width + col + 1]
                     break
 
                 x_vert += dx
@@ -93,13 +175,105 @@ class Raycasting:
                 x_hor %= 1
                 offset = (1 - x_hor) if sin_a > 0 else x_hor
 
-            depth *= math.cos(self.player.angle - ray_angle)
+            depth *= RAY_TABLE.correction_list[ray]
 
             proj_height = SCREEN_DISTANCE / (depth + 0.0001)
 
-            self.raycast_result.append((depth, proj_height, str(texture), offset))
+            self.raycast_result.append((depth, proj_height, texture, offset))
 
             ray_angle += DELTA_ANGLE
+
+        depths, proj_heights, textures, offsets = zip(*self.raycast_result)
+        self.depths = np.array(depths)
+        self.proj_heights = np.array(proj_heights)
+        self.texture_ids = np.array(textures, dtype=np.int32)
+        self.offsets = np.array(offsets)
+
+    def raycast_numpy(self) -> None:
+        """Cast all the rays at once as array operations.
+
+        Works the same way as `raycast_python`, but every intersection of every ray is 
+        computed up front as a (RAYS, MAX_DEPTH) array and looked up in the occupancy grid 
+        in one go. The first wall along each row is the hit.
+        """
+        ox, oy = self.player.position
+        x_grid, y_grid = self.player.grid_position
+
+        sin_a, cos_a = RAY_TABLE.ray_trig(self.player.angle)
+
+        # horizontals
+        y_hor = np.where(sin_a > 0, y_grid + 1, y_grid - 1e-6)
+        dy = np.where(sin_a > 0, 1, -1)
+        depth_hor = (y_hor - oy) / sin_a
+        x_hor = ox + depth_hor * cos_a
+        delta_depth = dy / sin_a
+        dx = delta_depth * cos_a
+
+        steps_hor, tex_hor = self.first_hit(x_hor, y_hor, dx, dy)
+        depth_hor += delta_depth * steps_hor
+        x_hor += dx * steps_hor
+
+        # verticals
+        x_vert = np.where(cos_a > 0, x_grid + 1, x_grid - 1e-6)
+        dx = np.where(cos_a > 0, 1, -1)
+        depth_vert = (x_vert - ox) / cos_a
+        y_vert = oy + depth_vert * sin_a
+        delta_depth = dx / cos_a
+        dy = delta_depth * sin_a
+
+        steps_vert, tex_vert = self.first_hit(x_vert, y_vert, dx, dy)
+        depth_vert += delta_depth * steps_vert
+        y_vert += dy * steps_vert
+
+        vert = depth_vert < depth_hor
+        depth = np.where(vert, depth_vert, depth_hor)
+        texture = np.where(vert, tex_vert, tex_hor)
+        y_vert %= 1
+        x_hor %= 1
+        offset = np.where(vert,
+                          np.where(cos_a > 0, y_vert, 1 - y_vert),
+                          np.where(sin_a > 0, 1 - x_hor, x_hor))
+
+        depth *= RAY_TABLE.correction
+
+        proj_height = SCREEN_DISTANCE / (depth + 0.0001)
+
+        self.depths, self.proj_heights, self.texture_ids, self.offsets = depth, proj_height, texture, offset
+        self.raycast_result = list(zip(depth.tolist(), proj_height.tolist(), texture.tolist(), offset.tolist()))
+
+    def first_hit(self, x: np.ndarray, y: np.ndarray, dx: np.ndarray, dy: np.ndarray) \
+            -> tuple[np.ndarray, np.ndarray]:
+        """Step every ray `MAX_DEPTH` times from (x, y) and find the first wall it enters.
+
+        Args:
+            x (np.ndarray): The x of the first intersection of each ray.
+            y (np.ndarray): The y of the first intersection of each ray.
+            dx (np.ndarray): The x distance between two intersections of each ray.
+            dy (np.ndarray): The y distance between two intersections of each ray.
+
+        Returns:
+            tuple[np.ndarray, np.ndarray]: The number of steps taken before the hit, and the 
+                texture id of the wall that was hit. Rays that hit nothing take `MAX_DEPTH` 
+                steps and get texture id 0.
+        """
+        height, width = self.map.solid.shape
+
+        xs = x[:, None] + dx[:, None] * self.steps
+        ys = y[:, None] + dy[:, None] * self.steps
+        # truncate like int() does, anything out of bounds lands on the empty border
+        cols = np.clip(xs, -1, width).astype(np.intp) + 1
+        rows = np.clip(ys, -1, height).astype(np.intp) + 1
+
+        hits = self.solid_padded[rows, cols]
+        steps = hits.argmax(axis=1)
+        ray = np.arange(len(steps))
+        missed = ~hits[ray, steps]
+
+        tex = self.tex_ids_padded[rows[ray, steps], cols[ray, steps]]
+        tex[missed] = 0
+        steps[missed] = MAX_DEPTH
+
+        return steps, tex
     
     def update(self) -> None:
         self.raycast()
@@ -0,0 +1,103 @@
+"""The queue of everything drawn in the 3D view in a frame.
+
+Walls never overlap one another, so they don't need to be sorted: they are queued in 
+column order and drawn first. Only the sprites are sorted by depth, and each one is 
+drawn only over the columns where it is in front of the wall. The depth of the wall in 
+every column is kept in a z-buffer, which sprites are tested against before they are 
+even scaled.
+"""
+
+import pygame as pg
+import numpy as np
+
+from config import *
+
+
+class RenderQueue:
+    """Collects the walls and sprites of a frame and draws them.
+
+    Attributes:
+        `surface` (`pg.Surface`): The Surface to draw on.
+        `walls` (`list[tuple[pg.Surface, tuple[float, float]]]`): The wall columns in column order.
+        `sprites` (`list[tuple[float, pg.Surface, tuple[float, float], list[tuple[int, int]]]]`): 
+            The depth, image, on-screen position and visible slices of every sprite.
+        `depth_buffer` (`np.ndarray`): The depth of the wall in every ray column (the z-buffer).
+        `occluded` (`int`): The number of sprites hidden behind walls this frame.
+    """
+
+    def __init__(self, surface: pg.Surface) -> None:
+        self.surface: pg.Surface = surface
+
+        self.walls: list[tuple[pg.Surface, tuple[float, float]]] = []
+        self.sprites: list[tuple[float, pg.Surface, tuple[float, float], list[tuple[int, int]]]] = []
+        self.depth_buffer: np.ndarray = np.full(RAYS, np.inf)
+        self.occluded: int = 0
+
+    def clear(self, depths: np.ndarray) -> None:
+        """Empty the queue for a new frame.
+
+        Args:
+            depths (np.ndarray): The depth of the wall hit by each ray this frame.
+        """
+        self.walls = []
+        self.sprites = []
+        self.depth_buffer = depths
+        self.occluded = 0
+
+    def add_wall(self, image: pg.Surface, pos: tuple[float, float]) -> None:
+        """Queue a wall column. Columns must be added from left to right."""
+
+        self.walls.append((image, pos))
+
+    def add_sprite(self, depth: float, image: pg.Surface, pos: tuple[float, float], slices: list[tuple[int, int]]) -> None:
+        """Queue a sprite.
+
+        Args:
+            depth (float): The depth of the sprite.
+            image (pg.Surface): The scaled image of the sprite.
+            pos (tuple[float, float]): The on-screen position of the sprite.
+            slices (list[tuple[int, int]]): The visible slices of the sprite, from `visible_slices`.
+        """
+        self.sprites.append((depth, image, pos, slices))
+
+    def visible_slices(self, depth: float, x: float, width: int) -> list[tuple[int, int]]:
+        """Test a sprite against the z-buffer, column by column.
+
+        Args:
+            depth (float): The depth of the sprite.
+            x (float): The on-screen x of the left edge of the sprite.
+            width (int): The on-screen width of the sprite.
+
+        Returns:
+            list[tuple[int, int]]: The on-screen (left, right) of every slice of the sprite that 
+                is in front of the walls. Empty if the sprite is completely hidden.
+        """
+        x = int(x)
+
+        # the rays the sprite covers
+        first = max(x // SCALE, 0)
+        last = min((x + width - 1) // SCALE + 1, RAYS)
+        if first >= last:
+            return []
+
+        # find the runs of rays where the sprite is closer than the wall
+        visible = np.concatenate(([False], depth < self.depth_buffer[first:last], [False]))
+        edges = np.flatnonzero(visible[1:] != visible[:-1]).tolist()
+
+        slices = [(max((first + start) * SCALE, x), min((first + end) * SCALE, x + width))
+                  for start, end in zip(edges[::2], edges[1::2])]
+        if not slices:
+            self.occluded += 1
+        return slices
+
+    def draw(self) -> None:
+        """Draw the walls, then the sprites from the farthest to the closest."""
+
+        self.surface.blits(self.walls, doreturn=False)
+
+        self.sprites.sort(reverse=True, key=lambda s: s[0])
+        for _, image, pos, slices in self.sprites:
+            x, y = int(pos[0]), pos[1]
+            height = image.get_height()
+            for left, right in slices:
+                self.surface.blit(image, (left, y), (left - x, 0, right - left, height))
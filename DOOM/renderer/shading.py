@@ -0,0 +1,158 @@
+"""Distance shading of walls and sprites.
+
+Things further away from the player are drawn darker. Instead of computing the 
+brightness of every column and sprite and darkening it every frame, the depth is 
+looked up in a table that maps it to one of a fixed number of shading bands, and 
+textures are darkened once per band and reused.
+"""
+
+import math
+import pygame as pg
+import numpy as np
+
+from config import *
+from renderer.texture import TextureData
+
+# the brightness of anything close to the player, out of 255
+MAX_BRIGHTNESS: float = 230
+# the smallest mip level of a darkened wall texture
+MIN_MIP_SIZE: int = 8
+
+
+def get_shade(depth: float) -> float:
+    """Get how bright something `depth` away from the player should be drawn (0-255)."""
+
+    return min(255 / (1 + depth ** 5 * 0.00001), MAX_BRIGHTNESS)
+
+
+class Shading:
+    """Maps depths to shading bands, and makes darkened copies of images for every band.
+
+    Band 0 is the brightest and is used for everything close to the player, the last 
+    band is black. Darker bands are only used far away, where walls are small on screen, 
+    so their darkened wall textures are also stored at a smaller mip level.
+
+    Attributes:
+        `bands` (`int`): The number of shading bands.
+        `brightness` (`list[float]`): The brightness (0-255) of every band.
+        `lut` (`np.ndarray`): The band of every depth step, `SHADE_DEPTH_STEPS` steps per unit of depth.
+        `mip_sizes` (`np.ndarray`): The size of the darkened wall textures of every band.
+        `surfaces` (`dict[tuple[pg.Surface, int], pg.Surface]`): The darkened sprite images,
+            by image and band.
+        `textures` (`dict[tuple[TextureData, int], pg.Surface]`): The darkened wall textures,
+            by texture and band.
+
+    The darkened copies are made for the images of the loaded level, `clear` drops them
+    when another one is loaded.
+    """
+
+    def __init__(self, bands: int = SHADE_BANDS) -> None:
+        self.bands: int = max(bands, 1)
+        self.brightness: list[float] = [MAX_BRIGHTNESS * (1 - band / max(self.bands - 1, 1))
+                                        for band in range(self.bands)]
+
+        # anything further than the table covers is drawn with the last entry
+        depths = np.arange(2 * MAX_DEPTH * SHADE_DEPTH_STEPS) / SHADE_DEPTH_STEPS
+        shades = np.array([get_shade(depth) for depth in depths])
+        self.lut: np.ndarray = np.rint((MAX_BRIGHTNESS - shades) / MAX_BRIGHTNESS * (self.bands - 1)).astype(np.intp)
+        self.lut_list: list[int] = self.lut.tolist()
+
+        # a band's textures only need to be as big as the tallest wall drawn with it
+        self.mip_sizes: np.ndarray = np.full(self.bands, MIN_MIP_SIZE, dtype=np.int32)
+        for band in range(self.bands - 1, -1, -1):
+            nearest = np.flatnonzero(self.lut == band)
+            if len(nearest) == 0:
+                continue
+            if nearest[0] == 0:
+                self.mip_sizes[band] = TEX_SIZE
+                continue
+            proj_height = SCREEN_DISTANCE / depths[nearest[0]]
+            self.mip_sizes[band] = min(max(2 ** math.ceil(math.log2(proj_height)), MIN_MIP_SIZE), TEX_SIZE)
+
+        self.surfaces: dict[tuple[pg.Surface, int], pg.Surface] = {}
+        self.textures: dict[tuple[TextureData, int], pg.Surface] = {}
+
+    def clear(self) -> None:
+        """Drop every darkened copy, so the images they were made from can be unloaded."""
+
+        self.surfaces.clear()
+        self.textures.clear()
+
+    def band(self, depth: float) -> int:
+        """Get the shading band of something `depth` away from the player."""
+
+        return self.lut_list[min(int(depth * SHADE_DEPTH_STEPS), len(self.lut_list) - 1)]
+
+    def bands_of(self, depths: np.ndarray) -> np.ndarray:
+        """Get the shading bands of an array of depths."""
+
+        return self.lut[np.minimum((depths * SHADE_DEPTH_STEPS).astype(np.intp), len(self.lut) - 1)]
+
+    def shaded_surface(self, surface: pg.Surface, band: int) -> pg.Surface:
+        """Get a copy of `surface` darkened for `band`. The copy is made once and shared, the 
+        original is left untouched.
+        """
+        key = surface, band
+        shaded = self.surfaces.get(key)
+        if shaded is None:
+            shaded = surface.copy()
+            shaded.fill([self.brightness[band]] * 3, special_flags=pg.BLEND_RGB_MULT)
+            self.surfaces[key] = shaded
+        return shaded
+
+    def shaded_texture(self, texture: TextureData, band: int) -> pg.Surface:
+        """Get the mip level of a wall texture for `band`, darkened for it. Made once and shared.
+
+        Returns:
+            pg.Surface: A square Surface with a size of `mip_sizes[band]`.
+        """
+        key = texture, band
+        shaded = self.textures.get(key)
+        if shaded is None:
+            size = int(self.mip_sizes[band])
+            if size == texture.width:
+                shaded = texture.texture.copy()
+            else:
+                shaded = pg.transform.smoothscale(texture.texture, (size, size))
+            shaded.fill([self.brightness[band]] * 3, special_flags=pg.BLEND_RGB_MULT)
+            self.textures[key] = shaded
+        return shaded
+
+    def texel_mips(self, texels: np.ndarray) -> dict[int, np.ndarray]:
+        """Make the mip levels of an (x, y) array of packed 32-bit texels used by the bands.
+
+        Args:
+            texels (np.ndarray): Square texels, as returned by `TextureData.get_texels`.
+
+        Returns:
+            dict[int, np.ndarray]: The (x, y, channel) bytes of every mip level, by size.
+        """
+        sizes = set(self.mip_sizes.tolist())
+        smallest = min(sizes)
+        level = np.ascontiguousarray(texels).view(np.uint8).reshape(*texels.shape, 4)
+        size = texels.shape[0]
+
+        mips = {}
+        while size >= smallest:
+            if size in sizes:
+                mips[size] = level
+            if size == smallest:
+                break
+            # average every 2x2 block of every channel
+            size //= 2
+            level = (level.reshape(size, 2, size, 2, 4).sum(axis=(1, 3), dtype=np.uint16) // 4).astype(np.uint8)
+        return mips
+
+    def shaded_texels(self, mips: dict[int, np.ndarray], band: int) -> np.ndarray:
+        """Get the mip level of a texture for `band`, darkened for it.
+
+        Args:
+            mips (dict[int, np.ndarray]): The mip levels of the texture, from `texel_mips`.
+            band (int): The shading band.
+
+        Returns:
+            np.ndarray: The darkened packed 32-bit texels with a size of `mip_sizes[band]`.
+        """
+        size = int(self.mip_sizes[band])
+        channels = mips[size].astype(np.uint16) * round(self.brightness[band]) // 255
+        return channels.astype(np.uint8).view(np.uint32).reshape(size, size)
@@ -0,0 +1,93 @@
+"""Rejects the sprites that can't be on screen before any per-sprite math is done.
+
+The positions of the sprites are kept as a structure of arrays, so the view cone test
+runs over all of them at once, and only the sprites in front of the player are visited
+in Python.
+"""
+
+from __future__ import annotations
+from typing import TYPE_CHECKING
+if TYPE_CHECKING:
+    from renderer.sprite_object import SpriteObject
+
+import math
+
+import numpy as np
+
+from config import *
+
+
+class SpriteCuller:
+    """The positions of a group of sprites that don't move, and a vectorized view cone test.
+
+    Attributes:
+        `sprites` (`list[SpriteObject]`): The sprites, in the same order as the arrays.
+        `slots` (`dict[SpriteObject, int]`): The index of every sprite in the arrays.
+        `xs` (`np.ndarray`): The x of every sprite. Only the first `len(sprites)` are used.
+        `ys` (`np.ndarray`): The y of every sprite. Only the first `len(sprites)` are used.
+    """
+
+    def __init__(self, capacity: int = 64) -> None:
+        self.sprites: list[SpriteObject] = []
+        self.slots: dict[SpriteObject, int] = {}
+        self.xs: np.ndarray = np.zeros(capacity)
+        self.ys: np.ndarray = np.zeros(capacity)
+
+    def add(self, sprite: SpriteObject) -> None:
+        count = len(self.sprites)
+        if count == len(self.xs):
+            self.xs = np.resize(self.xs, count * 2)
+            self.ys = np.resize(self.ys, count * 2)
+
+        self.slots[sprite] = count
+        self.sprites.append(sprite)
+        self.xs[count] = sprite.x
+        self.ys[count] = sprite.y
+
+    def remove(self, sprite: SpriteObject) -> None:
+        """Remove `sprite` by moving the last sprite into its place."""
+
+        slot = self.slots.pop(sprite)
+        last = self.sprites.pop()
+        if last is not sprite:
+            self.sprites[slot] = last
+            self.slots[last] = slot
+            self.xs[slot] = self.xs[len(self.sprites)]
+            self.ys[slot] = self.ys[len(self.sprites)]
+
+    def clear(self) -> None:
+        self.sprites = []
+        self.slots = {}
+
+    def visible(self, x: float, y: float, angle: float, visible_cells: np.ndarray = None) -> list[SpriteObject]:
+        """Get the sprites that may be on screen for a player at (`x`, `y`) facing `angle`.
+
+        A sprite is kept when it is within `SPRITE_CULL_HALF_ANGLE` of the view direction
+        and `MAX_DEPTH` of the player, or closer than `SPRITE_CULL_NEAR_DISTANCE`, and its
+        cell is in `visible_cells` if given.
+        """
+        count = len(self.sprites)
+        if not count:
+            return []
+
+        dx = self.xs[:count] - x
+        dy = self.ys[:count] - y
+        dist_sq = dx * dx + dy * dy
+        # the dot product with the view direction against the cone's cosine, without a sqrt
+        # or any trig per sprite; fine since the cone is narrower than 180 degrees
+        dot = dx * math.cos(angle) + dy * math.sin(angle)
+        in_cone = (dot > 0) & (dot * dot >= math.cos(SPRITE_CULL_HALF_ANGLE) ** 2 * dist_sq) \
+            & (dist_sq <= MAX_DEPTH * MAX_DEPTH)
+        keep = in_cone | (dist_sq <= SPRITE_CULL_NEAR_DISTANCE * SPRITE_CULL_NEAR_DISTANCE)
+
+        if visible_cells is not None:
+            height, width = visible_cells.shape
+            xs, ys = self.xs[:count], self.ys[:count]
+            inside = (xs >= 0) & (xs < width) & (ys >= 0) & (ys < height)
+            cols = np.clip(xs, 0, width - 1).astype(np.intp)
+            rows = np.clip(ys, 0, height - 1).astype(np.intp)
+            # positions out of the map count as visible
+            keep &= visible_cells[rows, cols] | ~inside
+
+        sprites = self.sprites
+        return [sprites[i] for i in np.flatnonzero(keep).tolist()]
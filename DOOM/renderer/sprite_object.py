@@ -4,17 +4,43 @@ if TYPE_CHECKING:
     from game import Game
 
 import pygame as pg
-import os
 from collections import deque
 
 from config import *
+from renderer.asset_store import ASSETS
+from renderer.entity_store import ENTITIES, EntityField
 
 
 class SpriteObject:
+    """A billboard sprite in the world.
+
+    The sprite is a handle to a slot of `ENTITIES`: the attributes declared as 
+    `EntityField`s are kept in its arrays, so `ObjectsManager` can project every sprite 
+    in one batch. Subclasses without `__slots__` can still add any attribute.
+    """
+
+    __slots__ = ("game", "slot", "image", "image_width", "image_height", "image_half_height", "image_ratio",
+                 "sprite_half_width", "potentially_visible", "list_index")
+
+    x = EntityField()
+    y = EntityField()
+    sprite_scale = EntityField()
+    sprite_height_shift = EntityField()
+    image_half_width = EntityField()
+
+    # computed by `EntityStore.project`
+    dx = EntityField()
+    dy = EntityField()
+    theta = EntityField()
+    screen_x = EntityField()
+    dist = EntityField()
+    norm_dist = EntityField()
+
     def __init__(self, game: Game, image_name: str, position: tuple[float, float] = (0, 0), scale: float = 1, shift: float = 0) -> None:
         self.game: Game = game
+        self.slot: int = ENTITIES.allocate()
         self.x, self.y = position
-        self.image: pg.Surface = pg.image.load("DOOM/resources/textures/sprites/" + image_name + ".png").convert_alpha()
+        self.image: pg.Surface = ASSETS.image("DOOM/resources/textures/sprites/" + image_name + ".png")
         self.image_width, self.image_height = self.image.get_size()
         self.image_half_width, self.image_half_height = self.image_width // 2, self.image_height // 2
         self.image_ratio = self.image_width / self.image_height
@@ -22,41 +48,63 @@ class SpriteObject:
         self.sprite_scale = scale
         self.sprite_height_shift = shift
 
-        self.dx, self.dy = 0, 0
-        self.theta = 0
-        self.screen_x = 0
         self.dist = 1
         self.norm_dist = 1
         self.sprite_half_width = 0
+        # False when the sprite's cell can't be seen from the player's, so it isn't projected
+        self.potentially_visible: bool = True
+        # its index in the `ObjectsManager` list it is in, see `swap_remove`
+        self.list_index: int = -1
 
     def get_sprite_projection(self) -> None:
-        proj = SCREEN_DISTANCE / self.norm_dist * self.sprite_scale
-        proj_width, proj_height = proj * self.image_ratio, proj
-
-        image = pg.transform.scale(self.image, (proj_width, proj_height))
+        norm_dist = self.norm_dist
+        proj = SCREEN_DISTANCE / norm_dist * self.sprite_scale
+        # rounded so that sprites of about the same size share a cached scaled image
+        proj_height = max(round(proj / SPRITE_HEIGHT_STEP), 1) * SPRITE_HEIGHT_STEP
+        proj_width = proj_height * self.image_ratio
 
         self.sprite_half_width = proj_width // 2
         h_shift = proj_height * self.sprite_height_shift
         pos = self.screen_x - self.sprite_half_width, WIN_HALF_HEIGHT - proj_height // 2 + h_shift
 
-        self.game.raycast.objs_to_render.append((self.norm_dist, image, pos))
+        # don't bother scaling the sprite if it is completely behind walls
+        render_queue = self.game.raycast.render_queue
+        slices = render_queue.visible_slices(norm_dist, pos[0], int(proj_width))
+        if not slices:
+            return
+
+        image = self.get_scaled_image(proj_height)
+
+        render_queue.add_sprite(norm_dist, image, pos, slices)
     
+    def get_scaled_image(self, height: int) -> pg.Surface:
+        """Get the current image darkened for the sprite's depth and scaled to `height`.
+
+        The scaled images are cached and shared by every sprite using the same image, 
+        so they must not be modified.
+        """
+        object_renderer = self.game.object_renderer
+        band = object_renderer.shading.band(self.norm_dist)
+        image = self.image
+
+        def make() -> pg.Surface:
+            shaded = object_renderer.shading.shaded_surface(image, band)
+            return pg.transform.scale(shaded, (height * self.image_ratio, height))
+
+        return object_renderer.sprite_cache.get((image, band, height), make)
+
     def get_sprite(self):
-        dx = self.x - self.game.player.x
-        dy = self.y - self.game.player.y
-        self.dx, self.dy = dx, dy
-        self.theta = math.atan2(dy, dx)
-
-        delta = self.theta - self.game.player.angle
-        if (dx > 0 and self.game.player.angle > math.pi) or (dx < 0 and dy < 0):
-            delta += math.tau
-        
-        delta_rays = delta / DELTA_ANGLE
-        self.screen_x = (HALF_RAYS + delta_rays) * SCALE
+        """Project the sprite if it is on screen.
+
+        The angle and distance to the player are computed for all the sprites at once by 
+        `ObjectsManager.update`. Sprites created after that, like dropped loot, are 
+        projected here.
+        """
+        if self.slot >= ENTITIES.projected:
+            player = self.game.player
+            ENTITIES.project(player.x, player.y, player.angle, start=ENTITIES.projected)
 
-        self.dist = math.hypot(dx, dy)
-        self.norm_dist = self.dist * math.cos(delta)
-        if -self.image_half_width < self.screen_x < (WIN_WIDTH + self.image_half_width) and self.norm_dist > 0.5:
+        if self.potentially_visible and ENTITIES.on_screen[self.slot]:
             self.get_sprite_projection()
 
     def update(self) -> None:
@@ -68,6 +116,8 @@ class SpriteObject:
 
 
 class AnimatedSpriteObject(SpriteObject):
+    __slots__ = ("animation_time", "path", "images", "anim_time_prev", "anim_trigger")
+
     def __init__(self, game, sprite_sheet_dir: str, animation_time: float, position: tuple[float, float] = (0, 0), scale: float = 1, shift: float = 0) -> None:
         super().__init__(game, sprite_sheet_dir + "/0", position, scale, shift)
         
@@ -95,12 +145,6 @@ class AnimatedSpriteObject(SpriteObject):
             self.anim_time_prev = t_now
             self.anim_trigger = True
 
-    def get_images(self, path: str) -> deque:
-        images = deque()
-
-        for file_name in os.listdir(path):
-            if os.path.isfile(os.path.join(path, file_name)):
-                img = pg.image.load(path + "/" + file_name).convert_alpha()
-                images.append(img)
-
-        return images
+    def get_images(self, path: str, scale: float = 1) -> deque:
+        # the images are shared, but every sprite rotates its own deque of them
+        return deque(ASSETS.images_in(path, scale))
@@ -0,0 +1,85 @@
+"""A bounded cache of generated Surfaces.
+
+Surfaces that are expensive to make but often requested again, such as scaled wall 
+columns, are kept in a `SurfaceCache`. The least recently used Surfaces are evicted 
+once the cache holds more pixel data than its budget allows.
+"""
+
+from collections import OrderedDict
+from typing import Any, Callable
+
+import pygame as pg
+
+
+class SurfaceCache:
+    """A least-recently-used cache of Surfaces, capped by the bytes of pixel data it holds.
+
+    Attributes:
+        `max_bytes` (`int`): The memory budget of the cache.
+        `bytes` (`int`): The pixel data currently held by the cache.
+        `hits` (`int`): The number of lookups that found a cached Surface.
+        `misses` (`int`): The number of lookups that had to make a new Surface.
+        `evictions` (`int`): The number of Surfaces evicted to stay within the budget.
+    """
+
+    def __init__(self, max_bytes: int) -> None:
+        self.max_bytes: int = max_bytes
+        self.bytes: int = 0
+
+        self.hits: int = 0
+        self.misses: int = 0
+        self.evictions: int = 0
+
+        self.surfaces: OrderedDict[Any, pg.Surface] = OrderedDict()
+
+    def get(self, key: Any, make: Callable[[], pg.Surface]) -> pg.Surface:
+        """Get the Surface cached under `key`, calling `make` to create it on a miss.
+
+        Args:
+            key (Any): A hashable key identifying the Surface.
+            make (Callable[[], pg.Surface]): Creates the Surface when it is not cached.
+
+        Returns:
+            pg.Surface: The cached Surface. It is shared, so it must not be modified.
+        """
+        surface = self.surfaces.get(key)
+        if surface is not None:
+            self.hits += 1
+            self.surfaces.move_to_end(key)
+            return surface
+
+        self.misses += 1
+        surface = make()
+        self.surfaces[key] = surface
+        self.bytes += self.size_of(surface)
+        self.evict()
+        return surface
+
+    def evict(self) -> None:
+        """Drop the least recently used Surfaces until the cache is within its budget."""
+
+        while self.bytes > self.max_bytes and len(self.surfaces) > 1:
+            _, surface = self.surfaces.popitem(last=False)
+            self.bytes -= self.size_of(surface)
+            self.evictions += 1
+
+    def clear(self) -> None:
+        self.surfaces.clear()
+        self.bytes = 0
+
+    def stats(self) -> dict[str, float]:
+        """Get the counters of the cache, for inspecting how well it works."""
+
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0,
+            "evictions": self.evictions,
+            "entries": len(self.surfaces),
+            "bytes": self.bytes
+        }
+
+    @staticmethod
+    def size_of(surface: pg.Surface) -> int:
+        return surface.get_pitch() * surface.get_height()
@@ -1,12 +1,25 @@
 import pygame as pg
+import numpy as np
 
 from config import *
 
 
 class TextureData:
-    def __init__(self, path: str, resolution: tuple = (TEX_SIZE, TEX_SIZE)):
-        self.texture: pg.Surface = pg.transform.scale(pg.image.load(path).convert_alpha(), resolution)
+    def __init__(self, path: str, resolution: tuple = (TEX_SIZE, TEX_SIZE), surface: pg.Surface = None):
+        if surface is None:
+            surface = pg.transform.scale(pg.image.load(path).convert_alpha(), resolution)
+        self.texture: pg.Surface = surface
         self.width, self.height = self.texture.get_size()
 
+        self.texels: np.ndarray = None
+
+    def get_texels(self, surface: pg.Surface) -> np.ndarray:
+        """Get the pixels of the texture as an (x, y) array of packed values in the pixel 
+        format of `surface`, so they can be copied straight into it. Only done once."""
+
+        if self.texels is None:
+            self.texels = pg.surfarray.array2d(self.texture.convert(surface)).astype(np.uint32)
+        return self.texels
+
 
 # WALL_TEX = TextureData("DOOM/textures/wall.png")
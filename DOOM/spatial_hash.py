@@ -0,0 +1,86 @@
+from typing import Any, Dict, List, Tuple
+
+
+class SpatialHash:
+    """A uniform grid index of entities by position, for finding the ones near a point.
+
+    Entities are anything with `x` and `y` attributes. They are put in the square cell of
+    `cell_size` units their position falls in, and queries only look at the cells that
+    overlap the queried area, so their cost depends on how crowded that area is instead of
+    the total number of entities.
+
+    Entities that move must be passed to `move`, which only touches the cells when the
+    entity crosses into another one.
+
+    Attributes:
+        `cell_size` (`float`): The size of a cell, in grid units.
+        `cells` (`dict[tuple[int, int], list]`): The entities in every non-empty cell.
+        `keys` (`dict[Any, tuple[int, int]]`): The cell every entity is in.
+    """
+
+    def __init__(self, cell_size: float) -> None:
+        self.cell_size: float = cell_size
+        self.cells: Dict[Tuple[int, int], List[Any]] = {}
+        self.keys: Dict[Any, Tuple[int, int]] = {}
+
+    def key(self, x: float, y: float) -> Tuple[int, int]:
+        return int(x // self.cell_size), int(y // self.cell_size)
+
+    def insert(self, entity: Any) -> None:
+        key = self.key(entity.x, entity.y)
+        self.keys[entity] = key
+        self.cells.setdefault(key, []).append(entity)
+
+    def remove(self, entity: Any) -> None:
+        key = self.keys.pop(entity, None)
+        if key is None:
+            return
+        cell = self.cells[key]
+        cell.remove(entity)
+        if not cell:
+            del self.cells[key]
+
+    def move(self, entity: Any) -> None:
+        """Update the cell of `entity` after it moved."""
+
+        key = self.key(entity.x, entity.y)
+        if self.keys.get(entity) != key:
+            self.remove(entity)
+            self.keys[entity] = key
+            self.cells.setdefault(key, []).append(entity)
+
+    def clear(self) -> None:
+        self.cells.clear()
+        self.keys.clear()
+
+    def query_radius(self, x: float, y: float, radius: float) -> List[Any]:
+        """Get the entities at most `radius` away from (`x`, `y`)."""
+
+        result = []
+        radius_sq = radius * radius
+        for cell in self.cells_around(x, y, radius):
+            for entity in cell:
+                dx = entity.x - x
+                dy = entity.y - y
+                if dx * dx + dy * dy <= radius_sq:
+                    result.append(entity)
+        return result
+
+    def cells_around(self, x: float, y: float, radius: float) -> List[List[Any]]:
+        """Get the non-empty cells overlapping the square of `radius` around (`x`, `y`)."""
+
+        min_x, min_y = self.key(x - radius, y - radius)
+        max_x, max_y = self.key(x + radius, y + radius)
+
+        # with few occupied cells, going through them is faster than through the square
+        if len(self.cells) < (max_x - min_x + 1) * (max_y - min_y + 1):
+            return [cell for key, cell in self.cells.items()
+                    if min_x <= key[0] <= max_x and min_y <= key[1] <= max_y]
+
+        found = []
+        for cy in range(min_y, max_y + 1):
+            for cx in range(min_x, max_x + 1):
+                cell = self.cells.get((cx, cy))
+                if cell is not None:
+                    found.append(cell)
+        return found
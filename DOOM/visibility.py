@@ -0,0 +1,146 @@
+from __future__ import annotations
+from typing import TYPE_CHECKING, Dict, List, Tuple
+if TYPE_CHECKING:
+    from game import Game
+    from enemy import Enemy
+
+import numpy as np
+
+from config import *
+from renderer.ray_table import RAY_TABLE
+from pvs import in_cells
+
+
+class Visibility:
+    """Line of sight between the player and the enemies, computed for all of them at once.
+
+    A ray is cast from the player towards every enemy, stepping through the horizontal and
+    vertical grid lines like the raycaster does. The enemy can see the player if the ray
+    reaches the enemy's cell before it reaches a wall. All the rays are stepped together
+    as (enemies, `MAX_DEPTH`) arrays. Enemies outside of the map's potentially visible set 
+    of the player's cell can't be seen, and get no ray.
+
+    Results are cached until the player or the enemy moves to another cell, or the map
+    changes.
+
+    Attributes:
+        `game` (`Game`): The game.
+        `cache` (`dict[Enemy, tuple]`): By enemy, the player's cell, the enemy's cell and the
+            map version the result was computed for, and the result.
+        `casts` (`int`): The number of rays cast, for inspecting how well the cache works.
+    """
+
+    def __init__(self, game: Game) -> None:
+        self.game: Game = game
+        self.cache: Dict[Enemy, Tuple[Tuple[int, int], Tuple[int, int], int, bool]] = {}
+        self.steps: np.ndarray = np.arange(MAX_DEPTH)
+
+        # the map's occupancy grid padded with an empty border, see `Raycasting.load_map_arrays`
+        self.solid_padded: np.ndarray = None
+        self.map_version: int = None
+
+        self.casts: int = 0
+
+    def update(self, enemies: List[Enemy]) -> None:
+        """Recompute the line of sight of every enemy whose cached result is out of date."""
+
+        stale = [enemy for enemy in enemies if not self.is_cached(enemy)]
+        if stale:
+            self.compute(stale)
+
+    def can_see(self, enemy: Enemy) -> bool:
+        """Check whether there is a line of sight between `enemy` and the player."""
+
+        if not self.is_cached(enemy):
+            self.compute([enemy])
+        return self.cache[enemy][3]
+
+    def is_cached(self, enemy: Enemy) -> bool:
+        entry = self.cache.get(enemy)
+        return entry is not None and entry[0] == self.game.player.grid_position \
+            and entry[1] == enemy.grid_position and entry[2] == self.game.level.map.version
+
+    def forget(self, enemy: Enemy) -> None:
+        self.cache.pop(enemy, None)
+
+    def compute(self, enemies: List[Enemy]) -> None:
+        level_map = self.game.level.map
+        if self.map_version != level_map.version:
+            self.solid_padded = np.pad(level_map.solid, 1)
+            self.map_version = level_map.version
+
+        player = self.game.player
+        player_cell = player.grid_position
+        ox, oy = player.position
+        x_grid, y_grid = player_cell
+
+        # enemies in cells that can't be seen from the player's cell don't need a ray
+        visible_cells = level_map.visible_cells(player_cell)
+        if visible_cells is not None:
+            hidden = [enemy for enemy in enemies if not in_cells(visible_cells, enemy.x, enemy.y)]
+            for enemy in hidden:
+                self.cache[enemy] = player_cell, enemy.grid_position, level_map.version, False
+            if hidden:
+                enemies = [enemy for enemy in enemies if in_cells(visible_cells, enemy.x, enemy.y)]
+                if not enemies:
+                    return
+
+        positions = np.array([enemy.position for enemy in enemies])
+        cells = positions.astype(np.intp)
+        ex, ey = cells[:, 0], cells[:, 1]
+
+        sin_a, cos_a = RAY_TABLE.trig(np.arctan2(positions[:, 1] - oy, positions[:, 0] - ox))
+
+        # horizontals
+        y_hor = np.where(sin_a > 0, y_grid + 1, y_grid - 1e-6)
+        dy = np.where(sin_a > 0, 1, -1)
+        depth_hor = (y_hor - oy) / sin_a
+        x_hor = ox + depth_hor * cos_a
+        delta_depth = dy / sin_a
+        dx = delta_depth * cos_a
+        player_d_hor, wall_d_hor = self.first_stop(x_hor, y_hor, dx, dy, depth_hor, delta_depth, ex, ey)
+
+        # verticals
+        x_vert = np.where(cos_a > 0, x_grid + 1, x_grid - 1e-6)
+        dx = np.where(cos_a > 0, 1, -1)
+        depth_vert = (x_vert - ox) / cos_a
+        y_vert = oy + depth_vert * sin_a
+        delta_depth = dx / cos_a
+        dy = delta_depth * sin_a
+        player_d_vert, wall_d_vert = self.first_stop(x_vert, y_vert, dx, dy, depth_vert, delta_depth, ex, ey)
+
+        player_dist = np.maximum(player_d_vert, player_d_hor)
+        wall_dist = np.maximum(wall_d_vert, wall_d_hor)
+        visible = ((0 < player_dist) & (player_dist < wall_dist)) | (wall_dist == 0)
+        # no walls inside a cell
+        visible |= (ex == x_grid) & (ey == y_grid)
+
+        version = level_map.version
+        for enemy, cell, result in zip(enemies, cells.tolist(), visible.tolist()):
+            self.cache[enemy] = player_cell, tuple(cell), version, result
+        self.casts += len(enemies)
+
+    def first_stop(self, x: np.ndarray, y: np.ndarray, dx: np.ndarray, dy: np.ndarray, depth: np.ndarray,
+                   delta_depth: np.ndarray, ex: np.ndarray, ey: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """Step every ray from (x, y) until it enters its enemy's cell or a wall.
+
+        Returns:
+            tuple[np.ndarray, np.ndarray]: The depth at which each ray reached its enemy, and
+                the depth at which it reached a wall. 0 where it didn't (first).
+        """
+        height, width = self.solid_padded.shape[0] - 2, self.solid_padded.shape[1] - 2
+
+        # truncate like int() does, anything out of bounds lands on the empty border
+        cols = np.clip(x[:, None] + dx[:, None] * self.steps, -1, width).astype(np.intp)
+        rows = np.clip(y[:, None] + dy[:, None] * self.steps, -1, height).astype(np.intp)
+
+        at_enemy = (cols == ex[:, None]) & (rows == ey[:, None])
+        stops = at_enemy | self.solid_padded[rows + 1, cols + 1]
+
+        steps = stops.argmax(axis=1)
+        ray = np.arange(len(steps))
+        stopped = stops[ray, steps]
+        reached_enemy = at_enemy[ray, steps]
+
+        depth = depth + delta_depth * steps
+        return np.where(stopped & reached_enemy, depth, 0), np.where(stopped & ~reached_enemy, depth, 0)
@@ -3,7 +3,6 @@ from typing import TYPE_CHECKING, Tuple
 if TYPE_CHECKING:
     from game import Game
 
-from collections import deque
 import pygame as pg
 
 from renderer.sprite_object import AnimatedSpriteObject
@@ -13,8 +12,7 @@ from config import *
 class Weapon(AnimatedSpriteObject):
     def __init__(self, game: Game, damage: int, max_ammo: int, init_ammo: int, max_range: float, sprite_sheet_dir: str, frame_time: float, scale: float, sound: pg.mixer.Sound) -> None:
         super().__init__(game, sprite_sheet_dir, animation_time=frame_time, scale=scale)
-        self.images = deque([pg.transform.scale(img, (img.get_width() * self.sprite_scale, img.get_height() * self.sprite_scale))
-                             for img in self.images])
+        self.images = self.get_images(self.path, self.sprite_scale)
         self.weapon_position = self.get_weapon_position(self.images[0])
 
         self.reloading: bool = False
@@ -2,7 +2,7 @@ import os
 import time
 
 try:
-    import pathfinding, pygame, PIL  # all needed libraries
+    import pygame, PIL, numpy  # all needed libraries
 except ModuleNotFoundError:
     print("Missing libraries, installing...")
     os.system("py -m pip install -r requirements.txt")  # install from requirements